@@ -1 +1,10 @@
-from .agent import mock_mentor_agent
+__all__ = ["mock_mentor_agent"]
+
+
+def __getattr__(name):
+    # Imported on first use: building the agent loads ADK and the model client,
+    # which PDF worker processes and the Streamlit pages never need
+    if name == "mock_mentor_agent":
+        from .agent import mock_mentor_agent
+        return mock_mentor_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
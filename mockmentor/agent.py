@@ -1,39 +1,17 @@
 
-import os
 from google.adk.agents import Agent
-from .tools import select_question, evaluate_response, get_profile, create_usage_report
+from google.adk.tools import ToolContext
+from . import tools
+from .models import get_model
+from .store import DEFAULT_USER
 from .prompts import MOCKMENTOR_INSTRUCTION
 
 
-def get_model():
-    """
-    Returns the appropriate model based on environment configuration.
-    
-    Environment variables:
-        MODEL_PROVIDER: "groq" or "gemini" (default: "groq")
-        MODEL_NAME: Specific model name (defaults based on provider)
-    """
-    provider = os.environ.get("MODEL_PROVIDER", "groq").lower()
-    
-    if provider == "gemini":
-        from google.adk.models import Gemini
-        model_name = os.environ.get("MODEL_NAME", "gemini-2.5-flash")
-        return Gemini(model=model_name)
-    else:
-        # Default to Groq via LiteLLM
-        from google.adk.models import LiteLlm
-        model_name = os.environ.get("MODEL_NAME", "moonshotai/kimi-k2-instruct")
-        # LiteLLM requires groq/ prefix for Groq models
-        if not model_name.startswith("groq/"):
-            model_name = f"groq/{model_name}"
-        return LiteLlm(model=model_name)
-
-
 # Initialize Model
 model = get_model()
 
 def _get_context_str():
-    profile = get_profile()
+    profile = tools.get_profile()
     weak_areas = profile.get("weak_areas", {})
     sorted_weak = sorted(weak_areas.items(), key=lambda x: x[1])
     
@@ -43,6 +21,35 @@ def _get_context_str():
     Questions Attempted: {len(profile.get("history", []))}
     """
 
+# Agent tools act on the session's own user: the id comes from session state
+# (or the runner's user id), never from an argument the model fills in
+
+def _user_id(tool_context: ToolContext) -> str:
+    if tool_context is None:
+        return DEFAULT_USER
+    return tool_context.state.get("user_id") or getattr(tool_context, "user_id", None) or DEFAULT_USER
+
+def select_question(topic: str = None, difficulty: str = None, tool_context: ToolContext = None) -> dict:
+    """
+    Selects an appropriate interview question based on user's weak areas and history.
+    Topic options: sql, pipelines, modeling, system_design, debugging
+    """
+    return tools.select_question(topic, difficulty, user_id=_user_id(tool_context))
+
+async def evaluate_response(question_id: str, user_response: str, tool_context: ToolContext = None) -> dict:
+    """
+    Evaluates the user's response against the ideal answer and rubric.
+    """
+    return await tools.aevaluate_response(question_id, user_response, user_id=_user_id(tool_context))
+
+def get_profile(tool_context: ToolContext = None) -> dict:
+    """Gets the user's stats, weak areas, and history."""
+    return tools.get_profile(_user_id(tool_context))
+
+def create_usage_report(tool_context: ToolContext = None) -> str:
+    """Generates a comprehensive performance summary."""
+    return tools.create_usage_report(_user_id(tool_context))
+
 final_instruction = MOCKMENTOR_INSTRUCTION.format(
     user_context_str="(Dynamic context will be loaded via tools)"
 )
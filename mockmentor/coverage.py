@@ -0,0 +1,36 @@
+"""
+Coverage Matching
+Cheap keyword overlap between an answer and expected points
+"""
+
+import re
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "your", "you", "are", "was",
+    "were", "has", "have", "had", "not", "but", "can", "will", "would", "should", "could",
+    "how", "what", "why", "when", "which", "who", "its", "their", "them", "they", "then",
+    "than", "also", "each", "use", "uses", "using", "used", "via", "per", "all", "any",
+    "more", "most", "less", "such", "other", "about", "over", "under", "like", "just"
+}
+STEM_LENGTH = 5
+
+
+def keywords(text: str) -> set:
+    """Lower-cased word stems (first few characters) minus stopwords."""
+    words = re.findall(r"[a-z0-9_]+", (text or "").lower())
+    return {w[:STEM_LENGTH] for w in words if len(w) >= 3 and w not in STOPWORDS}
+
+
+def point_coverage(answer, point: str) -> float:
+    """
+    Fraction of a point's keywords present in the answer.
+
+    Args:
+        answer: Answer text, or a keyword set from `keywords()` to reuse
+        point: Expected point (e.g. one of a question's ideal_points)
+    """
+    answer_words = answer if isinstance(answer, set) else keywords(answer)
+    point_words = keywords(point)
+    if not point_words:
+        return 1.0
+    return len(point_words & answer_words) / len(point_words)
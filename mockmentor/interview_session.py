@@ -4,11 +4,17 @@ Manages the interview flow, state, and evaluation
 """
 
 import json
+import os
+import uuid
 from datetime import datetime
 from typing import Optional, List, Dict
 import streamlit as st
 
 
+# Follow-ups asked per plan question (a follow-up's own follow-ups count too)
+MAX_FOLLOW_UPS = int(os.environ.get("MOCKMENTOR_MAX_FOLLOW_UPS", "1"))
+
+
 class InterviewSession:
     """Manages an interview session state."""
     
@@ -27,6 +33,8 @@ class InterviewSession:
         self.voice_metrics = []
         self.started_at = None
         self.mode = "text"  # "text" or "voice"
+        self.follow_up_speculation = None  # (question text, Future of candidates)
+        self.follow_ups = {}  # answered question index -> follow-up queued after it (or None)
     
     def start_interview(self, resume: dict, jd: dict, match: dict, plan: dict):
         """Initialize interview with parsed data."""
@@ -38,6 +46,7 @@ class InterviewSession:
         self.answers = []
         self.current_question_idx = 0
         self.current_depth = 0
+        self.follow_ups = {}
     
     def get_current_question(self) -> Optional[dict]:
         """Get the current question to ask."""
@@ -72,6 +81,54 @@ class InterviewSession:
                 **voice_metrics
             })
     
+    def speculate_follow_ups(self):
+        """Start pre-generating follow-ups for the current question (once per question)."""
+        question = self.get_current_question()
+        if not question:
+            return
+        if self.follow_up_speculation and self.follow_up_speculation[0] == question.get("text"):
+            return
+        depth = question.get("depth", self.current_depth)
+        if depth >= MAX_FOLLOW_UPS:
+            return  # No follow-up will be asked after this one
+        from .question_gen import start_follow_up_speculation
+        self.follow_up_speculation = (question.get("text"), start_follow_up_speculation(question, depth))
+    
+    def next_follow_up(self, answer_text: str, score: float = None,
+                       wait_seconds: float = 1.0) -> Optional[dict]:
+        """
+        Choose a follow-up for the answer and queue it as the next question.
+        
+        At most MAX_FOLLOW_UPS follow it each plan question, and well-graded
+        answers get none. Uses the speculative candidates when they are
+        ready (waiting at most `wait_seconds`, since speculation runs at
+        background priority) and otherwise lets the model decide. Repeated
+        calls for the same question (a rerun or double submit) return the
+        follow-up already queued instead of inserting another.
+        """
+        question = self.get_current_question()
+        if not question:
+            return None
+        if self.current_question_idx in self.follow_ups:
+            return self.follow_ups[self.current_question_idx]
+        
+        depth = question.get("depth", self.current_depth)
+        follow_up = None
+        if depth < MAX_FOLLOW_UPS:
+            candidates = None
+            if self.follow_up_speculation and self.follow_up_speculation[0] == question.get("text"):
+                try:
+                    candidates = self.follow_up_speculation[1].result(timeout=wait_seconds)
+                except Exception:
+                    candidates = None
+            
+            from .question_gen import follow_up_for_answer
+            follow_up = follow_up_for_answer(question, answer_text, depth, candidates, score)
+            if follow_up:
+                self.interview_plan["questions"].insert(self.current_question_idx + 1, follow_up)
+        self.follow_ups[self.current_question_idx] = follow_up
+        return follow_up
+    
     def advance_question(self):
         """Move to next question."""
         self.current_question_idx += 1
@@ -172,6 +229,18 @@ def get_session() -> InterviewSession:
     return st.session_state.interview_session
 
 
+def get_user_id() -> str:
+    """
+    Profile id of this browser session, generated on first use.
+
+    Each session gets its own id; nothing the client sends (such as a
+    query parameter) selects whose profile is read or written.
+    """
+    if "user_id" not in st.session_state:
+        st.session_state.user_id = f"session-{uuid.uuid4().hex}"
+    return st.session_state.user_id
+
+
 def reset_session():
     """Reset the interview session."""
     st.session_state.interview_session = InterviewSession()
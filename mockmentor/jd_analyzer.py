@@ -3,37 +3,21 @@ JD Analyzer
 Extracts structured requirements from job descriptions using LLM
 """
 
-import json
+import asyncio
 from typing import Optional
 
+from .json_extract import extract_json
+from .llm_cache import discard_completion
+from .parse_cache import get_parse_cache, template_version, text_key
+from .prompt_budget import fit
+from .telemetry import probe
 
-def parse_jd_with_llm(jd_text: str) -> dict:
-    """
-    Use LLM to extract structured information from job description.
-    
-    Returns:
-        {
-            "title": str,
-            "company": str,
-            "required_skills": [str],
-            "preferred_skills": [str],
-            "experience_required": {"min": int, "max": int},
-            "education_required": str,
-            "responsibilities": [str],
-            "key_competencies": [str],
-            "interview_topics": [str],
-            "summary": str
-        }
-    """
-    from .tools import get_eval_model
-    
-    model = get_eval_model()
-    
-    prompt = f"""
+
+JD_PROMPT = """
     Extract structured information from this job description. Return ONLY valid JSON.
     
     Job Description:
-    {jd_text[:8000]}
+    {jd_text}
     
     Return JSON with this exact structure:
     {{
@@ -58,45 +42,94 @@ def parse_jd_with_llm(jd_text: str) -> dict:
     
     Return ONLY the JSON, no markdown.
     """
+
+
+async def aparse_jd_with_llm(jd_text: str) -> dict:
+    """
+    Async variant of parse_jd_with_llm.
+    """
+    from .tools import get_eval_model
+    
+    model = get_eval_model()
+    
+    prompt = JD_PROMPT.format(jd_text=fit(jd_text, 'jd'))
     
-    try:
-        response = model.generate(prompt)
-        text = response.text.strip()
-        
-        # Clean up potential markdown formatting
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        text = text.strip()
-        
-        return json.loads(text)
-    except Exception as e:
-        return {
-            "title": "Unknown Role",
-            "company": None,
-            "required_skills": [],
-            "preferred_skills": [],
-            "experience_required": {"min": 0, "max": 0},
-            "education_required": None,
-            "responsibilities": [],
-            "key_competencies": [],
-            "interview_topics": [],
-            "summary": f"Failed to parse JD: {str(e)}",
-            "raw_text": jd_text[:2000]
+    with probe("jd") as call:
+        try:
+            response = await model.agenerate(prompt)
+            return extract_json(response.text, dict)
+        except Exception as e:
+            call.fell_back(e)
+            await discard_completion(model, prompt)
+            return {
+                "title": "Unknown Role",
+                "company": None,
+                "required_skills": [],
+                "preferred_skills": [],
+                "experience_required": {"min": 0, "max": 0},
+                "education_required": None,
+                "responsibilities": [],
+                "key_competencies": [],
+                "interview_topics": [],
+                "summary": f"Failed to parse JD: {str(e)}",
+                "raw_text": jd_text[:2000],
+                "parse_error": str(e)
+            }
+
+
+def parse_jd_with_llm(jd_text: str) -> dict:
+    """
+    Use LLM to extract structured information from job description.
+    
+    Returns:
+        {
+            "title": str,
+            "company": str,
+            "required_skills": [str],
+            "preferred_skills": [str],
+            "experience_required": {"min": int, "max": int},
+            "education_required": str,
+            "responsibilities": [str],
+            "key_competencies": [str],
+            "interview_topics": [str],
+            "summary": str
         }
+    """
+    from .models import run_sync
+    
+    return run_sync(aparse_jd_with_llm(jd_text))
+
+
+async def aanalyze_jd(jd_text: str) -> dict:
+    """
+    Async variant of analyze_jd.
+    """
+    cache = get_parse_cache()
+    key = text_key(jd_text)
+    version = template_version(JD_PROMPT)
+    parsed = await asyncio.to_thread(cache.get, "jd", key, version) if cache is not None else None
+    if parsed is None:
+        parsed = await aparse_jd_with_llm(jd_text)
+        if cache is not None and "parse_error" not in parsed:
+            await asyncio.to_thread(cache.put, "jd", key, version, parsed)
+    parsed["raw_text"] = jd_text
+    return parsed
 
 
 def analyze_jd(jd_text: str) -> dict:
     """
     Main entry point for JD analysis.
     
+    JD text that matches an earlier one after whitespace normalisation is
+    answered from the parse cache (see parse_cache) until the prompt
+    template or model changes.
+    
     Args:
         jd_text: Raw job description text
     
     Returns:
         Structured JD data dict
     """
-    parsed = parse_jd_with_llm(jd_text)
-    parsed["raw_text"] = jd_text
-    return parsed
+    from .models import run_sync
+    
+    return run_sync(aanalyze_jd(jd_text))
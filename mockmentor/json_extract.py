@@ -0,0 +1,153 @@
+"""
+JSON Extractor
+Tolerant, incremental extraction of JSON from LLM output
+"""
+
+import json
+
+OPENERS = {"{": "}", "[": "]"}
+MAX_REPAIR_ATTEMPTS = 50
+MAX_START_ATTEMPTS = 20
+
+
+class JsonExtractor:
+    """
+    Single-pass scanner for the first JSON object or array in a text stream.
+
+    Feed text as it arrives; the scan state carries over between chunks, so
+    nothing is re-read. Prose and ``` fences before the JSON are skipped,
+    trailing commas are dropped, and when the text ends early `value()`
+    closes the open containers at the last point where an element was
+    complete. For a top-level array only whole elements are kept, so a
+    cut-off final item is dropped rather than returned half-filled.
+    """
+
+    def __init__(self, expect: type = None):
+        self.expect = expect
+        self.complete = False
+        self.repaired = False
+        self._out = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._cuts = []
+        self._top = None
+
+    def _opens(self, ch: str) -> bool:
+        if self.expect is dict:
+            return ch == "{"
+        if self.expect is list:
+            return ch == "["
+        return ch in OPENERS
+
+    def _cut_here(self) -> None:
+        # Top-level arrays keep whole elements only; objects keep any complete member
+        if self._top == "[" and len(self._stack) != 1:
+            return
+        self._cuts.append((len(self._out), "".join(reversed(self._stack))))
+
+    def feed(self, text: str) -> None:
+        """Scan another chunk of text."""
+        for ch in text:
+            if self.complete:
+                return
+            if self._top is None:
+                if self._opens(ch):
+                    self._top = ch
+                    self._stack.append(OPENERS[ch])
+                    self._out.append(ch)
+                    self._cut_here()
+                continue
+
+            if self._in_string:
+                self._out.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in OPENERS:
+                self._stack.append(OPENERS[ch])
+            elif ch in "}]":
+                if not self._stack or ch != self._stack[-1]:
+                    continue
+                # Drop a trailing comma before the closer
+                while self._out and self._out[-1].isspace():
+                    self._out.pop()
+                if self._out and self._out[-1] == ",":
+                    self._out.pop()
+                self._stack.pop()
+                self._out.append(ch)
+                if not self._stack:
+                    self.complete = True
+                else:
+                    self._cut_here()
+                continue
+            elif ch == ",":
+                self._cut_here()
+            self._out.append(ch)
+
+    def value(self):
+        """
+        Best parse of what has been fed so far.
+
+        Returns:
+            The decoded object/array, repaired if the text was cut off
+
+        Raises:
+            ValueError: If no JSON could be recovered
+        """
+        text = "".join(self._out)
+        self.repaired = False
+        if self.complete:
+            try:
+                return json.loads(text)
+            except ValueError:
+                pass
+        for pos, closers in reversed(self._cuts[-MAX_REPAIR_ATTEMPTS:]):
+            try:
+                value = json.loads(text[:pos] + closers)
+            except ValueError:
+                continue
+            self.repaired = True
+            return value
+        raise ValueError("No JSON found in model output")
+
+
+def extract_json(text: str, expect: type = None):
+    """
+    Extract the first JSON object or array from model output.
+
+    Args:
+        text: Raw model text (may include prose, fences or be truncated)
+        expect: dict or list to only accept that kind of top-level value
+
+    Returns:
+        Decoded value; a truncated array keeps its complete elements
+
+    Raises:
+        ValueError: If nothing usable was found
+    """
+    openers = {dict: "{", list: "["}.get(expect, "{[")
+    start = 0
+    for _ in range(MAX_START_ATTEMPTS):
+        positions = [i for i in (text.find(ch, start) for ch in openers) if i >= 0]
+        if not positions:
+            break
+        start = min(positions)
+        extractor = JsonExtractor(expect)
+        extractor.feed(text[start:])
+        try:
+            value = extractor.value()
+        except ValueError:
+            value = None
+        # A bracket in leading prose ("[see below]") only repairs to an empty value
+        if value or value is not None and not extractor.repaired:
+            return value
+        start += 1
+    raise ValueError("No JSON found in model output")
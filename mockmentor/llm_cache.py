@@ -0,0 +1,242 @@
+"""
+LLM Completion Cache
+Content-addressed, size-bounded disk cache for model completions
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .models import TextResponse, run_sync
+from .telemetry import report_usage
+
+
+DEFAULT_CACHE_PATH = os.environ.get("MOCKMENTOR_LLM_CACHE_PATH", "mockmentor_llm_cache.db")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("MOCKMENTOR_LLM_CACHE_MB", "64")) * 1024 * 1024)
+DEFAULT_TTL_SECONDS = float(os.environ.get("MOCKMENTOR_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions (accessed);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+
+def cache_key(provider: str, model_name: str, prompt: str, params: dict = None) -> str:
+    """SHA-256 over (provider, model, prompt, generation params)."""
+    payload = json.dumps([provider, model_name, prompt, params or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    SQLite-backed LRU cache of completion text.
+
+    Entries expire after `ttl_seconds`; once the stored text exceeds
+    `max_bytes` the least recently used entries are evicted. SQLite's own
+    locking makes the file safe to share between worker processes, and the
+    hit/miss counters live in the same file so they cover all of them.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key: str, count: bool = True):
+        """
+        Return cached text for `key`, or None on a miss or expired entry.
+        With count=False the lookup is left out of the hit/miss counters.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT text, created FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+            if count:
+                self._bump(conn, "misses" if row is None else "hits")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def put(self, key: str, text: str) -> None:
+        """Store completion text and evict LRU entries beyond the size bound."""
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, text, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, text, size, now, now)
+            )
+            conn.execute("DELETE FROM completions WHERE created < ?", (now - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = []
+                for old_key, old_size in conn.execute(
+                    "SELECT key, size FROM completions ORDER BY accessed"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((old_key,))
+                    total -= old_size
+                conn.executemany("DELETE FROM completions WHERE key = ?", evicted)
+                self._bump(conn, "evictions", len(evicted))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, key: str) -> None:
+        """Drop the entry for `key`, if any."""
+        self._conn().execute("DELETE FROM completions WHERE key = ?", (key,))
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters plus current entry count and size."""
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "evictions": counters["evictions"],
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes
+        }
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM completions")
+        conn.execute("UPDATE counters SET value = 0")
+
+
+class CachedModel:
+    """
+    Wraps a text model so `generate`, `agenerate` and `astream` are answered
+    from the cache when an identical request was seen before. Any non-empty
+    completion is stored; callers that can't use one (unparseable JSON)
+    drop it with `discard_completion` so it isn't served again. Other
+    attributes pass through.
+    """
+
+    def __init__(self, model, cache: CompletionCache, provider: str, model_name: str):
+        self.model = model
+        self.cache = cache
+        self.provider = provider
+        self.model_name = model_name
+
+    async def agenerate(self, prompt: str, **params) -> TextResponse:
+        key = cache_key(self.provider, self.model_name, prompt, params)
+        text = await asyncio.to_thread(self.cache.get, key)
+        if text is not None:
+            report_usage(self.provider, prompt, text, cached=True)
+            return TextResponse(text, cached=True)
+        response = await self.model.agenerate(prompt, **params)
+        if response.text and not response.stored:
+            await asyncio.to_thread(self.cache.put, key, response.text)
+        return response
+
+    def generate(self, prompt: str, **params) -> TextResponse:
+        return run_sync(self.agenerate(prompt, **params))
+
+    async def astream(self, prompt: str, **params):
+        key = cache_key(self.provider, self.model_name, prompt, params)
+        text = await asyncio.to_thread(self.cache.get, key)
+        if text is not None:
+            report_usage(self.provider, prompt, text, cached=True)
+            yield text
+            return
+        chunks = []
+        async for chunk in self.model.astream(prompt, **params):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            await asyncio.to_thread(self.cache.put, key, "".join(chunks))
+
+    async def ainvalidate(self, prompt: str, **params) -> None:
+        key = cache_key(self.provider, self.model_name, prompt, params)
+        await asyncio.to_thread(self.cache.invalidate, key)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+async def discard_completion(model, prompt: str, **params) -> None:
+    """
+    Drop the cached completion of a request whose output the caller
+    couldn't use, so a retry asks the model again instead of getting the
+    same output until it expires. No-op when the model isn't cached.
+    """
+    invalidate = getattr(model, "ainvalidate", None)
+    if invalidate is not None:
+        await invalidate(prompt, **params)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache():
+    """
+    Return the process-wide completion cache, or None when disabled with
+    MOCKMENTOR_LLM_CACHE=0.
+    """
+    global _cache
+    if os.environ.get("MOCKMENTOR_LLM_CACHE", "1").lower() in ("0", "false", "off"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompletionCache()
+        return _cache
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters for sizing the cache; empty when the cache is disabled."""
+    cache = get_completion_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,222 @@
+"""
+Local Model
+Deterministic offline stand-in for the LLM providers (MODEL_PROVIDER=local)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+
+
+LATENCY = float(os.environ.get("MOCKMENTOR_LOCAL_LATENCY", "0"))
+JITTER = float(os.environ.get("MOCKMENTOR_LOCAL_JITTER", "0"))
+FAILURE_RATE = float(os.environ.get("MOCKMENTOR_LOCAL_FAILURE_RATE", "0"))
+_failures = random.Random(int(os.environ.get("MOCKMENTOR_LOCAL_SEED", "0")))
+STREAM_CHUNK = 24
+# Grading prompt fields end at a blank line or the next field label
+GRADING_FIELDS_END = r"\n\s*(?:\n|Ideal Answer Points:|User Answer:|Rubric:)"
+
+KNOWN_SKILLS = [
+    "Python", "SQL", "Spark", "Kafka", "Airflow", "dbt", "Snowflake", "BigQuery",
+    "Redshift", "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
+    "Pandas", "Scala", "Java", "Flink", "Hadoop", "PostgreSQL", "MongoDB"
+]
+
+PLAN_TEMPLATES = [
+    ("SQL", "technical", "medium", "How would you find the top 3 earners per department with a window function?"),
+    ("Data Pipelines", "technical", "medium", "Design an idempotent daily batch pipeline for {skill} data."),
+    ("Data Modeling", "technical", "hard", "How would you model slowly changing dimensions for this role's core entities?"),
+    ("Behavioral", "behavioral", "easy", "Tell me about a time you resolved a production data incident."),
+    ("System Design", "scenario", "hard", "Design a streaming system that ingests events with {skill} and serves hourly metrics."),
+    ("Data Quality", "technical", "medium", "How do you detect and alert on silent data quality regressions?"),
+]
+
+
+class LocalModelError(RuntimeError):
+    """Failure injected by MOCKMENTOR_LOCAL_FAILURE_RATE."""
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _section(prompt: str, label: str, until: str = GRADING_FIELDS_END) -> str:
+    """Text following `label:` up to the `until` pattern (or the end)."""
+    match = re.search(rf"{label}:\s*(.*?)(?:{until}|$)", prompt, re.S)
+    return match.group(1).strip() if match else ""
+
+
+def _skills(text: str) -> list:
+    lowered = text.lower()
+    return [skill for skill in KNOWN_SKILLS if skill.lower() in lowered]
+
+
+def _grade(question: str, ideal: str, answer: str) -> dict:
+    """Score by answer length and overlap with the ideal points."""
+    words = set(re.findall(r"[a-z0-9_]{4,}", answer.lower()))
+    ideal_words = set(re.findall(r"[a-z0-9_]{4,}", ideal.lower()))
+    coverage = len(words & ideal_words) / len(ideal_words) if ideal_words else 0.5
+    length = min(1.0, len(answer.split()) / 80)
+    overall = round(min(10, 2 + 5 * coverage + 3 * length), 1)
+    return {
+        "accuracy_score": round(min(10, 3 + 7 * coverage), 1),
+        "completeness_score": round(min(10, 2 + 4 * coverage + 4 * length), 1),
+        "clarity_score": round(min(10, 5 + 5 * length), 1),
+        "overall_score": overall,
+        "feedback": f"Covered {coverage:.0%} of the key points. "
+                    + ("Solid, well-developed answer." if overall >= 7 else "Add more specifics and trade-offs."),
+        "key_gap": "None" if coverage > 0.8 else "Address the remaining ideal points explicitly"
+    }
+
+
+def _resume(prompt: str) -> dict:
+    text = _section(prompt, "Resume", r"\n\s*Return JSON")
+    email = re.search(r"[\w.+-]+@[\w-]+\.[\w.]+", text)
+    phone = re.search(r"\+?\d[\d\s().-]{8,}\d", text)
+    years = re.search(r"(\d+)\+?\s+years", text)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    skills = _skills(text)
+    return {
+        "name": lines[0][:60] if lines else "Local Candidate",
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0) if phone else None,
+        "skills": skills,
+        "experience_years": float(years.group(1)) if years else 3.0,
+        "experience": [{"title": "Data Engineer", "company": "Example Corp", "duration": "2021-2024",
+                        "highlights": ["Built batch and streaming pipelines"]}],
+        "education": [{"degree": "B.Sc. Computer Science", "institution": "Example University", "year": "2020"}],
+        "projects": [{"name": "Pipeline Platform", "description": "Internal ELT framework",
+                      "technologies": skills[:3]}],
+        "summary": "Data engineer with hands-on pipeline experience."
+    }
+
+
+def _jd(prompt: str) -> dict:
+    text = _section(prompt, "Job Description", r"\n\s*Return JSON")
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    skills = _skills(text) or ["Python", "SQL"]
+    return {
+        "title": lines[0][:80] if lines else "Data Engineer",
+        "company": None,
+        "required_skills": skills[:6],
+        "preferred_skills": skills[6:] or ["Airflow"],
+        "experience_required": {"min": 2, "max": 5},
+        "education_required": "Bachelor's in CS or equivalent",
+        "responsibilities": ["Build and operate data pipelines", "Model data for analytics"],
+        "key_competencies": ["Data modeling", "Pipeline reliability"],
+        "interview_topics": ["SQL", "Data Pipelines", "Data Modeling", "System Design"],
+        "summary": "Data engineering role focused on reliable pipelines."
+    }
+
+
+def _plan(prompt: str) -> list:
+    count = re.search(r"Generate exactly (\d+)", prompt)
+    count = int(count.group(1)) if count else 5
+    skills = _skills(prompt) or ["Spark"]
+    questions = []
+    for i in range(count):
+        topic, kind, difficulty, text = PLAN_TEMPLATES[i % len(PLAN_TEMPLATES)]
+        questions.append({
+            "topic": topic,
+            "text": text.format(skill=skills[i % len(skills)]),
+            "difficulty": difficulty,
+            "type": kind,
+            "ideal_points": ["States assumptions", "Explains trade-offs", "Gives a concrete example"],
+            "follow_up_prompts": ["Ask how they would test it"]
+        })
+    return questions
+
+
+def _follow_up(prompt: str) -> dict:
+    answer = re.search(r'They answered: "(.*?)"\s*\n', prompt, re.S)
+    depth = re.search(r"Current depth level: (\d+)", prompt)
+    words = len(answer.group(1).split()) if answer else 0
+    if words < 40 and (int(depth.group(1)) if depth else 0) < 2:
+        return {
+            "should_follow_up": True,
+            "reason": "Answer was brief",
+            "follow_up_text": "Can you walk me through a concrete example of that, including the trade-offs?",
+            "target_point": "Concrete example"
+        }
+    return {"should_follow_up": False, "feedback": "Good depth on that answer."}
+
+
+def respond(prompt: str) -> str:
+    """Deterministic completion text for one of MockMentor's prompt families."""
+    if "from this resume" in prompt:
+        return json.dumps(_resume(prompt))
+    if "from this job description" in prompt:
+        return json.dumps(_jd(prompt))
+    if "personalized mock interview" in prompt:
+        return json.dumps(_plan(prompt))
+    if "Decide if we should" in prompt:
+        return json.dumps(_follow_up(prompt))
+    if "is about to answer" in prompt:
+        points = _section(prompt, "Ideal points to cover").split(", ")
+        return json.dumps([
+            {"target_point": point, "follow_up_text": f"How would you handle this aspect: {point}?",
+             "reason": "Likely gap"}
+            for point in points if point
+        ])
+    if "Grade each answer below" in prompt:
+        blocks = re.split(r"\n\s*Answer (\d+)\n", prompt)[1:]
+        results = []
+        for number, block in zip(blocks[::2], blocks[1::2]):
+            result = _grade(_section(block, "Question"), _section(block, "Ideal Answer Points"),
+                            _section(block, "User Answer"))
+            results.append({"index": int(number), **result})
+        return json.dumps(results)
+    if "Grade this answer" in prompt:
+        result = _grade(_section(prompt, "Question"), _section(prompt, "Ideal Answer Points"),
+                        _section(prompt, "User Answer"))
+        if "SCORES:" in prompt:
+            feedback = result.pop("feedback")
+            return f"{feedback}\nSCORES: {json.dumps(result)}"
+        return json.dumps(result)
+    return "Thanks, let's continue with the next question."
+
+
+async def _delay(prompt: str) -> None:
+    """Injected latency (seeded by the prompt) and failures (seeded run-wide)."""
+    rng = random.Random(_seed(prompt))
+    latency = max(0.0, LATENCY + rng.uniform(-JITTER, JITTER))
+    if latency:
+        await asyncio.sleep(latency)
+    if FAILURE_RATE and _failures.random() < FAILURE_RATE:
+        raise LocalModelError("Injected local model failure")
+
+
+async def agenerate_local(prompt: str) -> str:
+    await _delay(prompt)
+    return respond(prompt)
+
+
+async def astream_local(prompt: str):
+    await _delay(prompt)
+    text = respond(prompt)
+    for i in range(0, len(text), STREAM_CHUNK):
+        yield text[i:i + STREAM_CHUNK]
+        await asyncio.sleep(0)
+
+
+def build_local_llm(model_name: str):
+    """ADK model for the agent, answering from `respond`."""
+    from typing import AsyncGenerator
+
+    from google.adk.models import BaseLlm, LlmResponse
+    from google.genai import types
+
+    class LocalLlm(BaseLlm):
+        async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+            prompt = ""
+            for content in reversed(llm_request.contents or []):
+                if content.role == "user" and content.parts:
+                    prompt = "".join(part.text or "" for part in content.parts)
+                    break
+            text = await agenerate_local(prompt)
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part.from_text(text=text)]))
+
+    return LocalLlm(model=model_name)
@@ -0,0 +1,289 @@
+"""
+Model Registry
+Builds each LLM client once per process and shares it across modules
+"""
+
+import asyncio
+import contextvars
+import os
+import queue
+import threading
+
+
+DEFAULT_MODEL_NAMES = {
+    "gemini": "gemini-2.5-flash",
+    "groq": "moonshotai/kimi-k2-instruct",
+    "local": "local-stub",
+}
+
+_models = {}
+_text_models = {}
+_models_lock = threading.Lock()
+
+
+def resolve_model(provider: str = None, model_name: str = None) -> tuple:
+    """
+    Resolve (provider, model_name) from arguments or environment.
+
+    Environment variables:
+        MODEL_PROVIDER: "groq", "gemini" or "local"/"fake" (default: "groq")
+        MODEL_NAME: Specific model name (defaults based on provider)
+    """
+    provider = (provider or os.environ.get("MODEL_PROVIDER", "groq")).lower()
+    if provider == "fake":
+        provider = "local"
+    if provider not in ("gemini", "local"):
+        provider = "groq"
+    model_name = model_name or os.environ.get("MODEL_NAME", DEFAULT_MODEL_NAMES[provider])
+    # LiteLLM requires groq/ prefix for Groq models
+    if provider == "groq" and not model_name.startswith("groq/"):
+        model_name = f"groq/{model_name}"
+    return provider, model_name
+
+
+def _build_model(provider: str, model_name: str):
+    if provider == "local":
+        from .local_model import build_local_llm
+        return build_local_llm(model_name)
+    if provider == "gemini":
+        from google.adk.models import Gemini
+        return Gemini(model=model_name)
+    # Default to Groq via LiteLLM
+    from google.adk.models import LiteLlm
+    return LiteLlm(model=model_name)
+
+
+def get_model(provider: str = None, model_name: str = None):
+    """
+    Return the shared client for a (provider, model) pair.
+
+    The client is built on first use and reused afterwards, so its HTTP
+    connections stay open across calls.
+    """
+    key = resolve_model(provider, model_name)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = _build_model(*key)
+        return model
+
+
+def clear_models() -> None:
+    """Drop all cached clients (e.g. after changing credentials)."""
+    with _models_lock:
+        _models.clear()
+        _text_models.clear()
+
+
+# --- Single-prompt text completion ---
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    The process-wide event loop that sync callers hand coroutines to.
+
+    It runs for the life of the process on a daemon thread, so clients
+    cached by get_text_model keep their connection pools bound to a live
+    loop between calls.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="mockmentor-loop", daemon=True).start()
+        return _loop
+
+
+async def _in_context(context: contextvars.Context, coro):
+    # Carry the caller's context (e.g. the rate-limit priority) into the loop's task
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def _submit(coro):
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("Blocking on the background loop from its own thread; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), loop)
+
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Works both from plain threads (Streamlit) and from code already running
+    inside another event loop (ADK tool calls): the coroutine runs on the
+    shared background loop and the caller blocks for its result.
+    """
+    return _submit(coro).result()
+
+
+def iter_sync(agen):
+    """
+    Iterate an async generator from synchronous code.
+
+    The generator runs on the shared background loop; items are handed
+    over as soon as they are produced, so callers see them incrementally.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((True, item))
+        except BaseException as e:
+            items.put((False, e))
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        else:
+            items.put((False, None))
+
+    future = _submit(pump())
+    try:
+        while True:
+            ok, item = items.get()
+            if ok:
+                yield item
+            elif item is None:
+                return
+            else:
+                raise item
+    finally:
+        # Stop the generator if the caller stopped iterating early
+        future.cancel()
+
+
+class TextResponse:
+    """Completion text plus where it came from."""
+
+    def __init__(self, text: str, cached: bool = False, prompt_tokens: int = None,
+                 completion_tokens: int = None):
+        self.text = text
+        self.cached = cached
+        # Already written to the completion cache (by a single-flight leader)
+        self.stored = False
+        # Provider-reported usage, when available
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class TextModel:
+    """
+    Prompt-in, text-out adapter over a shared ADK model client.
+
+    `agenerate` uses the provider's async API and `astream` its streaming
+    mode; `generate` is a blocking wrapper around `agenerate`. Calls wait
+    their turn in the provider's rate limiter (see ratelimit.py).
+    """
+
+    def __init__(self, model, provider: str, model_name: str):
+        self.model = model
+        self.provider = provider
+        self.model_name = model_name
+
+    def _request(self, prompt: str, params: dict):
+        from google.adk.models import LlmRequest
+        from google.genai import types
+
+        return LlmRequest(
+            model=self.model.model,
+            contents=[types.Content(role="user", parts=[types.Part.from_text(text=prompt)])],
+            config=types.GenerateContentConfig(**params)
+        )
+
+    @staticmethod
+    def _text(response) -> str:
+        if not response.content or not response.content.parts:
+            return ""
+        return "".join(part.text for part in response.content.parts if part.text)
+
+    async def _agenerate(self, prompt: str, params: dict) -> TextResponse:
+        chunks = []
+        usage = None
+        async for response in self.model.generate_content_async(self._request(prompt, params)):
+            chunks.append(self._text(response))
+            usage = getattr(response, "usage_metadata", None) or usage
+        return TextResponse(
+            "".join(chunks),
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            completion_tokens=getattr(usage, "candidates_token_count", None)
+        )
+
+    async def agenerate(self, prompt: str, **params) -> TextResponse:
+        from .ratelimit import get_limiter
+        from .telemetry import report_usage
+
+        response = await get_limiter(self.provider).run(lambda: self._agenerate(prompt, params), prompt)
+        report_usage(self.provider, prompt, response.text, prompt_tokens=response.prompt_tokens,
+                     completion_tokens=response.completion_tokens)
+        return response
+
+    async def astream(self, prompt: str, **params):
+        """Yield completion text chunks as the provider produces them."""
+        from .ratelimit import get_limiter
+        from .telemetry import current, report_usage
+
+        chunks = []
+        async for chunk in get_limiter(self.provider).stream(lambda: self._astream(prompt, params), prompt):
+            if not chunks and current() is not None:
+                current().first_token()
+            chunks.append(chunk)
+            yield chunk
+        report_usage(self.provider, prompt, "".join(chunks))
+
+    async def _astream(self, prompt: str, params: dict):
+        streamed = False
+        async for response in self.model.generate_content_async(self._request(prompt, params), stream=True):
+            text = self._text(response)
+            if getattr(response, "partial", False):
+                streamed = True
+                yield text
+            elif not streamed and text:
+                # Providers that don't stream send one final, complete response.
+                # Those that do repeat the aggregated text last; skip it.
+                yield text
+
+    def generate(self, prompt: str, **params) -> TextResponse:
+        return run_sync(self.agenerate(prompt, **params))
+
+
+class LocalTextModel(TextModel):
+    """TextModel over the offline stand-in; needs no ADK client."""
+
+    def __init__(self, provider: str, model_name: str):
+        super().__init__(None, provider, model_name)
+
+    async def _agenerate(self, prompt: str, params: dict) -> TextResponse:
+        from .local_model import agenerate_local
+        return TextResponse(await agenerate_local(prompt))
+
+    async def _astream(self, prompt: str, params: dict):
+        from .local_model import astream_local
+        async for chunk in astream_local(prompt):
+            yield chunk
+
+
+def get_text_model(provider: str = None, model_name: str = None) -> TextModel:
+    """Return the shared text adapter for a (provider, model) pair."""
+    key = resolve_model(provider, model_name)
+    if key[0] == "local":
+        with _models_lock:
+            text_model = _text_models.get(key)
+            if text_model is None:
+                text_model = _text_models[key] = LocalTextModel(*key)
+            return text_model
+    model = get_model(*key)
+    with _models_lock:
+        text_model = _text_models.get(key)
+        if text_model is None:
+            text_model = _text_models[key] = TextModel(model, *key)
+        return text_model
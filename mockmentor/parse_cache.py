@@ -0,0 +1,169 @@
+"""
+Parse Cache
+Content-addressed disk cache of parsed resumes and job descriptions
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+DEFAULT_PARSE_CACHE_PATH = os.environ.get("MOCKMENTOR_PARSE_CACHE_PATH", "mockmentor_parse_cache.db")
+DEFAULT_TTL_SECONDS = float(os.environ.get("MOCKMENTOR_PARSE_CACHE_TTL", str(30 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("MOCKMENTOR_PARSE_CACHE_ENTRIES", "5000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parsed (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_parsed_accessed ON parsed (accessed);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('stale', 0);
+"""
+
+
+def file_key(file_bytes: bytes, filename: str) -> str:
+    """SHA-256 of the file bytes, qualified by extension (it selects the extractor)."""
+    ext = filename.lower().split(".")[-1]
+    return f"{ext}:{hashlib.sha256(file_bytes).hexdigest()}"
+
+
+def text_key(text: str) -> str:
+    """SHA-256 of text normalised for Unicode form, line endings and whitespace runs."""
+    normalized = unicodedata.normalize("NFC", text or "")
+    normalized = "\n".join(re.sub(r"\s+", " ", line).strip() for line in normalized.splitlines())
+    normalized = re.sub(r"\n{2,}", "\n", normalized).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def template_version(template: str) -> str:
+    """
+    Version of a parse: the prompt template plus the configured model, so
+    editing a prompt or switching models invalidates earlier parses.
+    """
+    from .models import resolve_model
+    payload = json.dumps([template, list(resolve_model())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ParseCache:
+    """
+    SQLite-backed map from (kind, content hash) to a parsed dict.
+
+    An entry is used only if it was stored under the caller's current
+    version and is younger than `ttl_seconds`; otherwise it counts as stale
+    and is replaced by the next put. Beyond `max_entries` the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_PARSE_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, name: str) -> None:
+        self._conn().execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+    def get(self, kind: str, key: str, version: str):
+        """Return a fresh copy of the parsed dict, or None."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT data, version, created FROM parsed WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            self._bump("misses")
+            return None
+        if row[1] != version or time.time() - row[2] > self.ttl_seconds:
+            self._bump("stale")
+            return None
+        conn.execute("UPDATE parsed SET accessed = ? WHERE kind = ? AND key = ?", (time.time(), kind, key))
+        self._bump("hits")
+        return json.loads(row[0])
+
+    def put(self, kind: str, key: str, version: str, data: dict) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO parsed (kind, key, version, data, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, version, json.dumps(data), now, now)
+            )
+            conn.execute(
+                "DELETE FROM parsed WHERE rowid IN "
+                "(SELECT rowid FROM parsed ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        by_kind = dict(conn.execute("SELECT kind, COUNT(*) FROM parsed GROUP BY kind"))
+        lookups = counters["hits"] + counters["misses"] + counters["stale"]
+        return {
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": by_kind,
+            "max_entries": self.max_entries
+        }
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM parsed")
+        conn.execute("UPDATE counters SET value = 0")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """
+    Return the process-wide parse cache, or None when disabled with
+    MOCKMENTOR_PARSE_CACHE=0.
+    """
+    global _cache
+    if os.environ.get("MOCKMENTOR_PARSE_CACHE", "1").lower() in ("0", "false", "off"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParseCache()
+        return _cache
+
+
+def get_parse_cache_stats() -> dict:
+    """Hit/miss/stale counters and entries per kind; empty when the cache is disabled."""
+    cache = get_parse_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,104 @@
+"""
+PDF Extraction Benchmark
+Serial vs. process-pool text extraction over synthetic multi-page CVs
+
+Usage:
+    python -m mockmentor.pdf_benchmark [page counts...] [--workers N] [--repeat N]
+"""
+
+import argparse
+import os
+import time
+
+from . import resume_parser
+from .resume_parser import PDF_WORKERS, extract_text_from_pdf
+
+LINE = "Built {skill} pipelines processing {n}M events/day; owned SLAs, on-call and cost reviews for the data platform."
+SKILLS = ["Spark", "Kafka", "Airflow", "dbt", "Snowflake", "BigQuery", "Flink", "Python"]
+
+
+def synthetic_pdf(pages: int, lines_per_page: int = 48) -> bytes:
+    """
+    A dense text PDF (Helvetica, one section rule per page) built by hand,
+    so the benchmark needs no PDF-writing dependency.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        commands = [f"0.5 w 40 800 m 570 800 l S BT /F1 8 Tf 40 785 Td 11 TL"]
+        for i in range(lines_per_page):
+            text = LINE.format(skill=SKILLS[(page + i) % len(SKILLS)], n=page * 10 + i)
+            commands.append(f"(Page {page + 1}, item {i + 1}: {text}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _time(file_bytes: bytes, workers: int, repeat: int) -> tuple:
+    best = None
+    text = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract_text_from_pdf(file_bytes, workers=workers)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, text
+
+
+def run(page_counts: list, workers: int, repeat: int) -> list:
+    """Best-of-`repeat` serial and parallel times per page count."""
+    # Start the pool outside the timings; it is reused across uploads in the app
+    extract_text_from_pdf(synthetic_pdf(workers), workers=workers)
+    rows = []
+    for pages in page_counts:
+        file_bytes = synthetic_pdf(pages)
+        serial, serial_text = _time(file_bytes, 1, repeat)
+        parallel, parallel_text = _time(file_bytes, workers, repeat)
+        rows.append({
+            "pages": pages,
+            "serial_seconds": round(serial, 3),
+            "parallel_seconds": round(parallel, 3),
+            "speedup": round(serial / parallel, 2) if parallel else None,
+            "same_text": serial_text == parallel_text
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("pages", nargs="*", type=int, default=[5, 10, 20, 40])
+    parser.add_argument("--workers", type=int, default=max(2, PDF_WORKERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Force the parallel path for every size so the threshold doesn't hide the comparison
+    resume_parser.PDF_PARALLEL_PAGES = 1
+
+    print(f"workers={args.workers} cpus={os.cpu_count()}")
+    print(f"{'pages':>6}{'serial s':>10}{'parallel s':>12}{'speedup':>9}{'same':>6}")
+    for row in run(args.pages, args.workers, args.repeat):
+        print(f"{row['pages']:>6}{row['serial_seconds']:>10}{row['parallel_seconds']:>12}"
+              f"{row['speedup']:>9}{str(row['same_text']):>6}")
@@ -0,0 +1,132 @@
+"""
+Pre-Grader
+Rule-based ideal_points coverage scoring that settles clear-cut answers without the LLM
+"""
+
+import os
+import re
+from functools import lru_cache
+
+from .coverage import keywords, point_coverage
+from .rubrics import RUBRICS
+
+
+PREGRADE_ENABLED = os.environ.get("MOCKMENTOR_PREGRADE", "1").lower() not in ("0", "false", "off")
+MIN_WORDS = int(os.environ.get("MOCKMENTOR_PREGRADE_MIN_WORDS", "12"))
+LONG_WORDS = int(os.environ.get("MOCKMENTOR_PREGRADE_LONG_WORDS", "250"))
+OFF_TOPIC_RELEVANCE = 0.15
+POINT_COVERED = 0.5
+
+# Code-like terms in ideal points ("PARTITION BY", "DENSE_RANK", "UNION ALL")
+# are matched as whole phrases: one hit covers the point
+PHRASE = re.compile(r"\b[A-Z][A-Z0-9_]+(?:\s+[A-Z][A-Z0-9_]+)*\b")
+
+
+class Matcher:
+    """Compiled per-question matcher over its ideal points, text and hints."""
+
+    def __init__(self, question: dict):
+        self.points = []
+        for point in question.get("ideal_points", []):
+            # Single plain terms ("RANK", "CTE") are too generic to cover a point alone
+            phrases = [p for p in PHRASE.findall(point) if " " in p or "_" in p]
+            pattern = re.compile(
+                "|".join(r"\b" + r"\s+".join(map(re.escape, p.split())) + r"\b" for p in phrases),
+                re.I
+            ) if phrases else None
+            self.points.append((point, pattern))
+        self.vocabulary = keywords(" ".join(
+            [question.get("text", "")] + question.get("ideal_points", []) + question.get("hints", [])
+        ))
+
+    def coverage(self, answer: str) -> list:
+        """Coverage (0-1) of each ideal point, in order."""
+        answer_words = keywords(answer)
+        return [
+            1.0 if pattern is not None and pattern.search(answer) else point_coverage(answer_words, point)
+            for point, pattern in self.points
+        ]
+
+    def relevance(self, answer: str) -> float:
+        """Share of the answer's keywords that belong to the question's vocabulary."""
+        answer_words = keywords(answer)
+        return len(answer_words & self.vocabulary) / len(answer_words) if answer_words else 0.0
+
+
+@lru_cache(maxsize=256)
+def _matcher(question_id: str) -> Matcher:
+    from .questions import QUESTIONS
+    return Matcher(QUESTIONS[question_id])
+
+
+def _weighted(accuracy: float, completeness: float, clarity: float) -> float:
+    rubric = RUBRICS["default"]
+    return (accuracy * rubric["accuracy"]["weight"]
+            + completeness * rubric["completeness"]["weight"]
+            + clarity * rubric["clarity"]["weight"])
+
+
+def pregrade(question: dict, user_response: str) -> dict:
+    """
+    Provisional grade from ideal-point coverage.
+
+    Args:
+        question: Bank question (needs "id" and "ideal_points")
+        user_response: Candidate's answer
+
+    Returns:
+        {"decisive": bool, "reason": str, "coverage": [float], "result": dict}
+        where "result" has the shape of evaluate_response. Only decisive
+        pre-grades (very short or off-topic answers) should be used in place
+        of LLM grading. Keyword coverage can't tell a right answer from one
+        using the right terms wrongly, so covered answers always go to the LLM.
+    """
+    matcher = _matcher(question["id"]) if question.get("id") else Matcher(question)
+    words = len((user_response or "").split())
+    coverage = matcher.coverage(user_response or "") if matcher.points else []
+    covered = [c >= POINT_COVERED for c in coverage]
+    share = sum(covered) / len(covered) if covered else 0.0
+    mean = sum(coverage) / len(coverage) if coverage else 0.0
+    relevance = matcher.relevance(user_response or "")
+
+    if not matcher.points:
+        decisive, reason = False, "no ideal points"
+    elif words > LONG_WORDS:
+        decisive, reason = False, "long answer"
+    elif words < MIN_WORDS and share < 0.5:
+        decisive, reason = True, "too short"
+    elif relevance < OFF_TOPIC_RELEVANCE and not any(covered):
+        decisive, reason = True, "off topic"
+    else:
+        decisive, reason = False, "covered" if all(covered) else "borderline"
+
+    completeness = 10 * mean
+    accuracy = 2 + 6 * share
+    clarity = min(8.0, 4 + words / 25)
+    if reason in ("too short", "off topic"):
+        accuracy, clarity = min(accuracy, 3.0), min(clarity, 4.0)
+    missing = [point for (point, _), ok in zip(matcher.points, covered) if not ok]
+
+    if reason == "too short":
+        feedback = "This answer is too brief to assess. Walk through your reasoning and cover the key points."
+    elif reason == "off topic":
+        feedback = "This answer doesn't address the question. Re-read it and focus on what is being asked."
+    elif missing:
+        feedback = f"You covered {sum(covered)} of {len(covered)} key points. Also address: {'; '.join(missing)}."
+    else:
+        feedback = "You covered all the key points."
+
+    return {
+        "decisive": decisive,
+        "reason": reason,
+        "coverage": [round(c, 2) for c in coverage],
+        "result": {
+            "accuracy_score": round(accuracy, 1),
+            "completeness_score": round(completeness, 1),
+            "clarity_score": round(clarity, 1),
+            "overall_score": round(_weighted(accuracy, completeness, clarity), 1),
+            "feedback": feedback,
+            "key_gap": missing[0] if missing else "None",
+            "pregraded": reason
+        }
+    }
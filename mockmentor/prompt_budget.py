@@ -0,0 +1,184 @@
+"""
+Prompt Budget
+Token-aware compaction and truncation of the variable parts of prompts
+"""
+
+import os
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to per-provider character ratios
+    tiktoken = None
+
+
+# Characters per token when no tokenizer is installed
+CHARS_PER_TOKEN = {
+    "groq": 3.6,
+    "gemini": 4.0,
+    "local": 4.0,
+}
+
+# Token budget for each prompt section (override with MOCKMENTOR_BUDGET_<SECTION>)
+SECTION_BUDGETS = {
+    "resume": 2000,
+    "jd": 2000,
+    "answer": 1200,
+    "follow_up_answer": 400,
+}
+
+# Share of an over-budget section kept from its end (answers conclude at the end)
+TAIL_SHARE = {
+    "answer": 0.3,
+    "follow_up_answer": 0.3,
+}
+
+ELLIPSIS = " [...] "
+
+BOILERPLATE = re.compile(
+    r"^(page \d+( of \d+)?|\d+\s*/\s*\d+|references available upon request\.?|"
+    r"curriculum vitae|resume|[-_=*•·.\s]+)$"
+    r"|equal opportunity employer|without regard to (race|color|religion)",
+    re.I
+)
+FILLERS = re.compile(r"\b(um+|uh+|erm|hmm+)\b[,.]?\s*", re.I)
+# Lines at the top or bottom of a page that can be running headers/footers
+PAGE_EDGE_LINES = 3
+
+_encoding = None
+
+
+def _encoder():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def _provider(provider: str = None) -> str:
+    if provider:
+        return provider
+    from .models import resolve_model
+    return resolve_model()[0]
+
+
+def count_tokens(text: str, provider: str = None) -> int:
+    """Token count for `text` under the given (or configured) provider."""
+    provider = _provider(provider)
+    encoder = _encoder()
+    # Gemini's tokenizer isn't BPE-compatible; its ratio is the better estimate
+    if encoder is not None and provider != "gemini":
+        return len(encoder.encode(text, disallowed_special=()))
+    return int(len(text) / CHARS_PER_TOKEN.get(provider, 4.0)) + 1
+
+
+def section_budget(section: str) -> int:
+    return int(os.environ.get(f"MOCKMENTOR_BUDGET_{section.upper()}", SECTION_BUDGETS[section]))
+
+
+def _normalize(line: str) -> str:
+    return re.sub(r"[ \t\u00a0]+", " ", line).strip()
+
+
+def page_furniture(text: str) -> set:
+    """
+    Lower-cased lines repeated at the top or bottom of two or more pages
+    (running headers and footers). Pages are separated by form feeds, as
+    in extract_text_from_pdf output; text without them has none.
+    """
+    pages = text.split("\f")
+    if len(pages) < 2:
+        return set()
+    seen = {}
+    for page in pages:
+        lines = [_normalize(line).lower() for line in page.splitlines()]
+        lines = [line for line in lines if line]
+        for line in set(lines[:PAGE_EDGE_LINES] + lines[-PAGE_EDGE_LINES:]):
+            seen[line] = seen.get(line, 0) + 1
+    return {line for line, count in seen.items() if count >= 2 and len(line) > 3}
+
+
+def compact(text: str) -> str:
+    """
+    Shrink text without losing content: collapse whitespace, drop page
+    furniture and legal boilerplate, and keep only the first copy of a
+    header/footer repeated across PDF pages. Other repeated lines (the
+    same job title at two employers, repeated code) are kept.
+    """
+    furniture = page_furniture(text)
+    lines = []
+    seen = set()
+    blank = False
+    for line in text.splitlines():
+        line = _normalize(line)
+        if not line:
+            blank = bool(lines)
+            continue
+        key = line.lower()
+        if BOILERPLATE.search(line) or (key in furniture and key in seen):
+            continue
+        seen.add(key)
+        if blank:
+            lines.append("")
+            blank = False
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _squeeze(text: str) -> str:
+    """Drop spoken fillers and runs of blank lines and spaces, keeping indentation."""
+    text = FILLERS.sub("", text)
+    lines = [re.sub(r"(?<=\S)[ \t\u00a0]+", " ", line).rstrip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip("\n")
+
+
+def _head(text: str, tokens: int, provider: str) -> str:
+    encoder = _encoder()
+    if encoder is not None and provider != "gemini":
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:tokens])
+    cut = text[:int(tokens * CHARS_PER_TOKEN.get(provider, 4.0))]
+    # Don't end mid-word
+    space = cut.rfind(" ")
+    return cut[:space] if space > len(cut) * 0.8 else cut
+
+
+def _tail(text: str, tokens: int, provider: str) -> str:
+    encoder = _encoder()
+    if encoder is not None and provider != "gemini":
+        encoded = encoder.encode(text, disallowed_special=())
+        return encoder.decode(encoded[-tokens:]) if tokens else ""
+    cut = text[-int(tokens * CHARS_PER_TOKEN.get(provider, 4.0)):] if tokens else ""
+    space = cut.find(" ")
+    return cut[space + 1:] if 0 <= space < len(cut) * 0.2 else cut
+
+
+def fit(text: str, section: str, provider: str = None) -> str:
+    """
+    Compact `text` and truncate it to the token budget of a prompt section.
+
+    Answers are graded as written, so they are passed through untouched
+    unless over budget; then only whitespace and fillers are squeezed
+    before truncating.
+
+    Args:
+        text: Variable prompt content (resume, JD, candidate answer, ...)
+        section: Key of SECTION_BUDGETS
+        provider: Model provider to count tokens for (defaults to configured)
+
+    Returns:
+        Text that fits the section budget
+    """
+    provider = _provider(provider)
+    budget = section_budget(section)
+    text = text or ""
+    if section in TAIL_SHARE:
+        if count_tokens(text, provider) <= budget:
+            return text
+        text = _squeeze(text)
+    else:
+        text = compact(text)
+    if count_tokens(text, provider) <= budget:
+        return text
+    tail_tokens = int(budget * TAIL_SHARE.get(section, 0.0))
+    head = _head(text, budget - tail_tokens, provider)
+    return head + ELLIPSIS + _tail(text, tail_tokens, provider) if tail_tokens else head
@@ -3,27 +3,27 @@ Dynamic Question Generator
 Generates personalized interview questions based on JD, resume, and match analysis
 """
 
-import json
+import os
 import random
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Optional
 
+from .coverage import keywords, point_coverage
+from .json_extract import extract_json
+from .llm_cache import discard_completion
+from .prompt_budget import fit
+from .ratelimit import BACKGROUND, INTERACTIVE, priority
+from .telemetry import probe
 
-def generate_interview_plan(jd: dict, resume: dict, match: dict, num_questions: int = 15) -> dict:
+# A speculative follow-up is used only for a point the answer barely touches
+FOLLOW_UP_COVERAGE_THRESHOLD = 0.2
+# Answers graded at least this well get no follow-up (the grader found no real gap)
+FOLLOW_UP_MAX_SCORE = float(os.environ.get("MOCKMENTOR_FOLLOW_UP_MAX_SCORE", "7"))
+
+
+async def agenerate_interview_plan(jd: dict, resume: dict, match: dict, num_questions: int = 15) -> dict:
     """
-    Create a personalized interview plan with dynamically generated questions.
-    
-    Args:
-        jd: Parsed job description
-        resume: Parsed resume
-        match: Match analysis result
-        num_questions: Total questions for the session
-    
-    Returns:
-        {
-            "topics": [{"name": str, "weight": float, "questions_allocated": int}],
-            "questions": [{"topic": str, "text": str, "difficulty": str, "type": str}],
-            "focus_areas": [str]
-        }
+    Async variant of generate_interview_plan.
     """
     from .tools import get_eval_model
     
@@ -74,93 +74,101 @@ def generate_interview_plan(jd: dict, resume: dict, match: dict, num_questions:
     Return ONLY the JSON array.
     """
     
-    try:
-        response = model.generate(prompt)
-        text = response.text.strip()
-        
-        # Clean markdown formatting safely
-        if "```" in text:
-            parts = text.split("```")
-            if len(parts) >= 2:
-                text = parts[1]
-                if text.startswith("json"):
-                    text = text[4:]
+    with probe("plan") as call:
+        try:
+            # Plan generation yields to interactive grading under rate limits
+            with priority(BACKGROUND):
+                response = await model.agenerate(prompt)
         
-        # Find JSON array in the text
-        text = text.strip()
-        if "[" in text:
-            start = text.index("[")
-            end = text.rfind("]") + 1
-            if end > start:
-                text = text[start:end]
+            # A truncated array still yields its complete questions
+            questions = [
+                q for q in extract_json(response.text, list)
+                if isinstance(q, dict) and q.get("text")
+            ]
+            if not questions:
+                raise ValueError("No questions in model output")
         
-        questions = json.loads(text)
+            # Extract unique topics
+            topics = {}
+            for q in questions:
+                topic = q.get("topic", "General")
+                topics[topic] = topics.get(topic, 0) + 1
         
-        # Extract unique topics
-        topics = {}
-        for q in questions:
-            topic = q.get("topic", "General")
-            topics[topic] = topics.get(topic, 0) + 1
+            topic_list = [
+                {"name": name, "questions_allocated": count, "weight": count / len(questions)}
+                for name, count in topics.items()
+            ]
         
-        topic_list = [
-            {"name": name, "questions_allocated": count, "weight": count / len(questions)}
-            for name, count in topics.items()
-        ]
-        
-        return {
-            "topics": topic_list,
-            "questions": questions,
-            "focus_areas": match.get("interview_focus_areas", []),
-            "total_questions": len(questions)
-        }
+            return {
+                "topics": topic_list,
+                "questions": questions,
+                "focus_areas": match.get("interview_focus_areas", []),
+                "total_questions": len(questions)
+            }
         
-    except Exception as e:
-        # Return fallback questions on error
-        return {
-            "topics": [{"name": "General", "questions_allocated": 3, "weight": 1.0}],
-            "questions": [
-                {
-                    "topic": "Introduction",
-                    "text": "Tell me about yourself and your interest in this role.",
-                    "difficulty": "easy",
-                    "type": "behavioral",
-                    "ideal_points": ["Clear summary", "Relevant experience", "Motivation"],
-                    "follow_up_prompts": []
-                },
-                {
-                    "topic": "Experience",
-                    "text": "Walk me through a challenging project you've worked on.",
-                    "difficulty": "medium",
-                    "type": "behavioral",
-                    "ideal_points": ["Context", "Your actions", "Results"],
-                    "follow_up_prompts": []
-                },
-                {
-                    "topic": "Technical",
-                    "text": f"What's your experience with {(jd.get('required_skills') or ['the required technologies'])[0] if jd.get('required_skills') else 'the required technologies'}?",
-                    "difficulty": "medium",
-                    "type": "technical",
-                    "ideal_points": ["Hands-on experience", "Specific examples", "Depth of knowledge"],
-                    "follow_up_prompts": []
-                }
-            ],
-            "focus_areas": [],
-            "total_questions": 3,
-            "error": str(e)
-        }
+        except Exception as e:
+            call.fell_back(e)
+            await discard_completion(model, prompt)
+            # Return fallback questions on error
+            return {
+                "topics": [{"name": "General", "questions_allocated": 3, "weight": 1.0}],
+                "questions": [
+                    {
+                        "topic": "Introduction",
+                        "text": "Tell me about yourself and your interest in this role.",
+                        "difficulty": "easy",
+                        "type": "behavioral",
+                        "ideal_points": ["Clear summary", "Relevant experience", "Motivation"],
+                        "follow_up_prompts": []
+                    },
+                    {
+                        "topic": "Experience",
+                        "text": "Walk me through a challenging project you've worked on.",
+                        "difficulty": "medium",
+                        "type": "behavioral",
+                        "ideal_points": ["Context", "Your actions", "Results"],
+                        "follow_up_prompts": []
+                    },
+                    {
+                        "topic": "Technical",
+                        "text": f"What's your experience with {(jd.get('required_skills') or ['the required technologies'])[0] if jd.get('required_skills') else 'the required technologies'}?",
+                        "difficulty": "medium",
+                        "type": "technical",
+                        "ideal_points": ["Hands-on experience", "Specific examples", "Depth of knowledge"],
+                        "follow_up_prompts": []
+                    }
+                ],
+                "focus_areas": [],
+                "total_questions": 3,
+                "error": str(e)
+            }
 
 
-def generate_follow_up(question: dict, user_response: str, current_depth: int = 0) -> Optional[dict]:
+def generate_interview_plan(jd: dict, resume: dict, match: dict, num_questions: int = 15) -> dict:
     """
-    Generate adaptive follow-up question based on user's response.
+    Create a personalized interview plan with dynamically generated questions.
     
     Args:
-        question: Original question dict
-        user_response: User's answer text
-        current_depth: How deep we've gone (0-3)
+        jd: Parsed job description
+        resume: Parsed resume
+        match: Match analysis result
+        num_questions: Total questions for the session
     
     Returns:
-        Follow-up question dict or None if sufficient depth reached
+        {
+            "topics": [{"name": str, "weight": float, "questions_allocated": int}],
+            "questions": [{"topic": str, "text": str, "difficulty": str, "type": str}],
+            "focus_areas": [str]
+        }
+    """
+    from .models import run_sync
+    
+    return run_sync(agenerate_interview_plan(jd, resume, match, num_questions))
+
+
+async def agenerate_follow_up(question: dict, user_response: str, current_depth: int = 0) -> Optional[dict]:
+    """
+    Async variant of generate_follow_up.
     """
     if current_depth >= 3:
         return None
@@ -172,7 +180,7 @@ def generate_follow_up(question: dict, user_response: str, current_depth: int =
     prompt = f"""
     The candidate was asked: "{question['text']}"
     
-    They answered: "{user_response[:1500]}"
+    They answered: "{fit(user_response, 'follow_up_answer')}"
     
     Ideal points to cover: {', '.join(question.get('ideal_points', []))}
     
@@ -200,32 +208,183 @@ def generate_follow_up(question: dict, user_response: str, current_depth: int =
     Return ONLY JSON.
     """
     
-    try:
-        response = model.generate(prompt)
-        text = response.text.strip()
+    with probe("follow_up") as call:
+        try:
+            with priority(INTERACTIVE):
+                response = await model.agenerate(prompt)
+            result = extract_json(response.text, dict)
         
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        text = text.strip()
-        
-        result = json.loads(text)
+            if result.get("should_follow_up"):
+                return {
+                    "topic": question.get("topic"),
+                    "text": result["follow_up_text"],
+                    "difficulty": question.get("difficulty"),
+                    "type": "follow_up",
+                    "parent_question": question["text"][:100],
+                    "depth": current_depth + 1,
+                    "ideal_points": [result.get("target_point", "Deeper understanding")]
+                }
+            return None
         
-        if result.get("should_follow_up"):
-            return {
-                "topic": question.get("topic"),
-                "text": result["follow_up_text"],
-                "difficulty": question.get("difficulty"),
-                "type": "follow_up",
-                "parent_question": question["text"][:100],
-                "depth": current_depth + 1,
-                "ideal_points": [result.get("target_point", "Deeper understanding")]
-            }
+        except Exception as e:
+            call.fell_back(e)
+            await discard_completion(model, prompt)
+            return None
+
+
+def generate_follow_up(question: dict, user_response: str, current_depth: int = 0) -> Optional[dict]:
+    """
+    Generate adaptive follow-up question based on user's response.
+    
+    Args:
+        question: Original question dict
+        user_response: User's answer text
+        current_depth: How deep we've gone (0-3)
+    
+    Returns:
+        Follow-up question dict or None if sufficient depth reached
+    """
+    from .models import run_sync
+    
+    return run_sync(agenerate_follow_up(question, user_response, current_depth))
+
+
+async def agenerate_follow_up_candidates(question: dict, current_depth: int = 0) -> list:
+    """
+    Async variant of generate_follow_up_candidates.
+    """
+    if current_depth >= 3 or not question.get("ideal_points"):
+        return []
+    
+    from .tools import get_eval_model
+    
+    model = get_eval_model()
+    
+    prompt = f"""
+    The candidate is about to answer: "{question['text']}"
+    
+    Ideal points to cover: {', '.join(question['ideal_points'])}
+    
+    Suggested probes: {', '.join(question.get('follow_up_prompts', [])) or 'None'}
+    
+    Current depth level: {current_depth} (0=surface, 3=very deep)
+    
+    For EACH ideal point, write the follow-up an interviewer would ask if the
+    candidate misses or only skims that point. Use the suggested probes where they fit.
+    
+    Return ONLY a JSON array, one object per ideal point:
+    [
+        {{
+            "target_point": "the ideal point, copied exactly",
+            "follow_up_text": "The full follow-up question",
+            "reason": "why we're asking this"
+        }}
+    ]
+    """
+    
+    with probe("follow_up_speculative") as call:
+        try:
+            # Speculative work must not delay anyone's grading
+            with priority(BACKGROUND):
+                response = await model.agenerate(prompt)
+            return [
+                c for c in extract_json(response.text, list)
+                if isinstance(c, dict) and c.get("follow_up_text") and c.get("target_point")
+            ]
+        except Exception as e:
+            call.fell_back(e)
+            await discard_completion(model, prompt)
+            return []
+
+
+def generate_follow_up_candidates(question: dict, current_depth: int = 0) -> list:
+    """
+    Pre-generate one follow-up per likely gap before the answer is in.
+    
+    Args:
+        question: Question dict with ideal_points (and optional follow_up_prompts)
+        current_depth: How deep we've gone (0-3)
+    
+    Returns:
+        [{"target_point": str, "follow_up_text": str, "reason": str}]
+    """
+    from .models import run_sync
+    
+    return run_sync(agenerate_follow_up_candidates(question, current_depth))
+
+
+_speculation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mockmentor-follow-up")
+
+
+def start_follow_up_speculation(question: dict, current_depth: int = 0) -> Future:
+    """Start generate_follow_up_candidates in the background and return its future."""
+    return _speculation_pool.submit(generate_follow_up_candidates, question, current_depth)
+
+
+def select_follow_up(question: dict, user_response: str, candidates: list,
+                     current_depth: int = 0) -> Optional[dict]:
+    """
+    Pick the precomputed follow-up whose target point the answer covers least.
+    
+    Returns:
+        Follow-up question dict (same shape as generate_follow_up), or None
+        when every candidate's point is already covered by the answer
+    """
+    answer_words = keywords(user_response)
+    scored = [
+        (point_coverage(answer_words, c["target_point"]), i, c)
+        for i, c in enumerate(candidates)
+    ]
+    scored = [item for item in scored if item[0] < FOLLOW_UP_COVERAGE_THRESHOLD]
+    if not scored:
         return None
-        
-    except:
+    _, _, best = min(scored, key=lambda item: (item[0], item[1]))
+    return {
+        "topic": question.get("topic"),
+        "text": best["follow_up_text"],
+        "difficulty": question.get("difficulty"),
+        "type": "follow_up",
+        "parent_question": question["text"][:100],
+        "depth": current_depth + 1,
+        "ideal_points": [best["target_point"]]
+    }
+
+
+async def afollow_up_for_answer(question: dict, user_response: str, current_depth: int = 0,
+                                candidates: list = None, score: float = None) -> Optional[dict]:
+    """
+    Async variant of follow_up_for_answer.
+    """
+    if current_depth >= 3 or (score is not None and score >= FOLLOW_UP_MAX_SCORE):
         return None
+    if candidates:
+        follow_up = select_follow_up(question, user_response, candidates, current_depth)
+        if follow_up is not None:
+            return follow_up
+    return await agenerate_follow_up(question, user_response, current_depth)
+
+
+def follow_up_for_answer(question: dict, user_response: str, current_depth: int = 0,
+                         candidates: list = None, score: float = None) -> Optional[dict]:
+    """
+    Follow-up for a submitted answer, preferring speculative candidates.
+    
+    Args:
+        question: Original question dict
+        user_response: User's answer text
+        current_depth: How deep we've gone (0-3)
+        candidates: Output of generate_follow_up_candidates, if available
+        score: The answer's overall grade (0-10), if known
+    
+    Returns:
+        Follow-up question dict, or None to move on. Answers graded at
+        least FOLLOW_UP_MAX_SCORE get none. Otherwise the model is only
+        called (and decides whether to follow up) when no candidate targets
+        a point the answer missed.
+    """
+    from .models import run_sync
+    
+    return run_sync(afollow_up_for_answer(question, user_response, current_depth, candidates, score))
 
 
 def get_next_question(interview_plan: dict, answered_indices: List[int], current_topic: str = None) -> Optional[dict]:
@@ -0,0 +1,239 @@
+"""
+Rate Limiter
+Per-provider token buckets with a priority queue for LLM calls
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# Lower runs first
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+
+DEFAULT_LIMITS = {
+    # provider: (requests per minute, tokens per minute)
+    "groq": (30, 10000),
+    "gemini": (10, 250000),
+    # Offline stand-in: effectively unlimited unless configured for a test
+    "local": (1e6, 1e9),
+}
+
+EXPECTED_OUTPUT_TOKENS = int(os.environ.get("MOCKMENTOR_EXPECTED_OUTPUT_TOKENS", "500"))
+MAX_RETRIES = int(os.environ.get("MOCKMENTOR_RATE_RETRIES", "4"))
+BACKOFF_BASE = float(os.environ.get("MOCKMENTOR_RATE_BACKOFF", "1.0"))
+BACKOFF_MAX = 30.0
+POLL_INTERVAL = 0.25
+WAIT_WINDOW = 500
+
+_priority = contextvars.ContextVar("mockmentor_llm_priority", default=NORMAL)
+
+
+@contextmanager
+def priority(level: int):
+    """Run LLM calls made inside the block at the given queue priority."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for provider 429 / quota errors (LiteLLM and google-genai)."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource_exhausted" in message
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute of budget."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+    def seconds_until(self, amount: float) -> float:
+        return max(0.0, (amount - self.level) / self._rate) if self._rate else float("inf")
+
+
+class ProviderLimiter:
+    """
+    Request and token budget for one provider.
+
+    Callers queue by (priority, arrival); only the head of the queue may
+    spend budget, so interactive calls overtake queued background work
+    without starving it once the interactive burst drains.
+    """
+
+    def __init__(self, provider: str, rpm: float, tpm: float):
+        self.provider = provider
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queue = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=WAIT_WINDOW)
+        self.counters = {"calls": 0, "throttled": 0, "retries": 0}
+
+    def _ready(self, tokens: float) -> float:
+        """Seconds until both buckets can cover the call (0 when ready)."""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.requests.seconds_until(1), self.tokens.seconds_until(tokens))
+
+    async def acquire(self, tokens: int, level: int = None) -> float:
+        """
+        Wait for budget for one call of about `tokens` tokens.
+
+        Returns:
+            Seconds spent waiting
+        """
+        tokens = min(tokens, self.tokens.capacity)
+        ticket = (_priority.get() if level is None else level, next(self._seq))
+        started = time.monotonic()
+        with self._lock:
+            heapq.heappush(self._queue, ticket)
+        try:
+            while True:
+                with self._lock:
+                    delay = POLL_INTERVAL
+                    if self._queue[0] == ticket:
+                        delay = self._ready(tokens)
+                        if delay <= 0:
+                            heapq.heappop(self._queue)
+                            self.requests.level -= 1
+                            self.tokens.level -= tokens
+                            waited = time.monotonic() - started
+                            self._waits.append(waited)
+                            self.counters["calls"] += 1
+                            return waited
+                await asyncio.sleep(min(max(delay, 0.01), POLL_INTERVAL))
+        except BaseException:
+            with self._lock:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+            raise
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage is known."""
+        with self._lock:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+
+    def throttled(self) -> None:
+        """The provider rejected a call: drain the buckets so queued calls back off too."""
+        with self._lock:
+            self.requests.level = min(self.requests.level, 0)
+            self.tokens.level = min(self.tokens.level, 0)
+            self.counters["throttled"] += 1
+
+    async def _backoff(self, error: Exception, attempt: int) -> None:
+        """Sleep before a retry, or re-raise when `error` is not retryable."""
+        if not is_rate_limited(error) or attempt == MAX_RETRIES:
+            raise error
+        self.throttled()
+        self.counters["retries"] += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+    async def run(self, call, prompt: str):
+        """
+        Run `call()` (a coroutine factory) within the budget, retrying with
+        jittered exponential backoff when the provider still answers 429.
+        """
+        estimated = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        for attempt in range(MAX_RETRIES + 1):
+            await self.acquire(estimated)
+            try:
+                response = await call()
+            except Exception as e:
+                await self._backoff(e, attempt)
+                continue
+            self.settle(estimated, estimate_tokens(prompt) + estimate_tokens(response.text or ""))
+            return response
+
+    async def stream(self, call, prompt: str):
+        """
+        Streaming form of `run`: `call()` returns an async iterator of text.
+        Rate-limit errors are retried only until the first chunk arrives.
+        """
+        estimated = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        for attempt in range(MAX_RETRIES + 1):
+            await self.acquire(estimated)
+            produced = 0
+            try:
+                async for chunk in call():
+                    produced += len(chunk)
+                    yield chunk
+            except Exception as e:
+                if produced:
+                    raise
+                await self._backoff(e, attempt)
+                continue
+            self.settle(estimated, estimate_tokens(prompt) + produced // 4)
+            return
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            depth = len(self._queue)
+        return {
+            **self.counters,
+            "queue_depth": depth,
+            "wait_avg_seconds": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95_seconds": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "wait_max_seconds": waits[-1] if waits else 0.0,
+            "rpm": self.requests.capacity,
+            "tpm": self.tokens.capacity
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """
+    Return the process-wide limiter for a provider.
+
+    Limits come from MOCKMENTOR_<PROVIDER>_RPM / MOCKMENTOR_<PROVIDER>_TPM,
+    defaulting to the providers' free-tier quotas.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            rpm, tpm = DEFAULT_LIMITS.get(provider, (60, 100000))
+            rpm = float(os.environ.get(f"MOCKMENTOR_{provider.upper()}_RPM", rpm))
+            tpm = float(os.environ.get(f"MOCKMENTOR_{provider.upper()}_TPM", tpm))
+            limiter = _limiters[provider] = ProviderLimiter(provider, rpm, tpm)
+        return limiter
+
+
+def get_rate_limit_stats() -> dict:
+    """Queue depth, wait times and throttling counters per provider."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.provider: limiter.stats() for limiter in limiters}
@@ -0,0 +1,188 @@
+"""
+Resume Fields
+Deterministic extraction of contact details, skills and dates from resume text
+"""
+
+import re
+from datetime import date
+
+
+# Bump when extraction rules change so cached parses are redone
+FIELDS_VERSION = "2"
+
+# Canonical skill name -> aliases (matched case-insensitively as whole terms)
+SKILLS = {
+    # Languages
+    "Python": ["python", "python3"], "SQL": ["sql"], "Scala": ["scala"], "Java": ["java"],
+    "JavaScript": ["javascript", "js"], "TypeScript": ["typescript"], "Go": ["golang"],
+    "Rust": ["rust"], "C++": ["c++", "cpp"], "C#": ["c#"], "R": ["r programming", "rstudio"],
+    "Bash": ["bash", "shell scripting"], "Kotlin": ["kotlin"],
+    # Processing and orchestration
+    "Spark": ["spark", "apache spark", "pyspark", "spark sql"], "Hadoop": ["hadoop", "hdfs", "mapreduce"],
+    "Hive": ["hive"], "Flink": ["flink", "apache flink"], "Beam": ["apache beam", "dataflow"],
+    "Kafka": ["kafka", "apache kafka"], "Kinesis": ["kinesis"], "Pub/Sub": ["pub/sub", "pubsub"],
+    "RabbitMQ": ["rabbitmq"], "Airflow": ["airflow", "apache airflow"], "Dagster": ["dagster"],
+    "Prefect": ["prefect"], "Luigi": ["luigi"], "dbt": ["dbt"], "Fivetran": ["fivetran"],
+    "Airbyte": ["airbyte"], "NiFi": ["nifi"], "Pandas": ["pandas"], "NumPy": ["numpy"],
+    "Polars": ["polars"], "Dask": ["dask"], "Ray": ["ray"],
+    # Storage and warehouses
+    "Snowflake": ["snowflake"], "BigQuery": ["bigquery", "big query"], "Redshift": ["redshift"],
+    "Databricks": ["databricks"], "Delta Lake": ["delta lake"], "Iceberg": ["iceberg", "apache iceberg"],
+    "Hudi": ["hudi"], "Parquet": ["parquet"], "Avro": ["avro"], "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"], "SQL Server": ["sql server", "mssql"], "Oracle": ["oracle"],
+    "MongoDB": ["mongodb", "mongo"], "Cassandra": ["cassandra"], "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "opensearch"], "DynamoDB": ["dynamodb"], "ClickHouse": ["clickhouse"],
+    "Trino": ["trino", "presto"], "Druid": ["druid"],
+    # Cloud and infrastructure
+    "AWS": ["aws", "amazon web services"], "GCP": ["gcp", "google cloud"], "Azure": ["azure"],
+    "S3": ["s3"], "EMR": ["emr"], "Glue": ["aws glue"], "Lambda": ["aws lambda"], "Athena": ["athena"],
+    "Docker": ["docker"], "Kubernetes": ["kubernetes", "k8s"], "Terraform": ["terraform"],
+    "CI/CD": ["ci/cd", "cicd", "github actions", "jenkins", "gitlab ci"], "Git": ["git"],
+    "Linux": ["linux"],
+    # Practices
+    "ETL": ["etl", "elt"], "Data Modeling": ["data modeling", "data modelling", "dimensional modeling",
+                                            "star schema", "kimball"],
+    "Data Warehousing": ["data warehousing", "data warehouse"], "Data Lake": ["data lake", "lakehouse"],
+    "Streaming": ["stream processing", "real-time streaming", "streaming pipelines"],
+    "Data Quality": ["data quality", "great expectations"], "Machine Learning": ["machine learning", "ml"],
+    "MLflow": ["mlflow"], "Tableau": ["tableau"], "Power BI": ["power bi"], "Looker": ["looker"],
+    "REST APIs": ["rest api", "rest apis", "restful"], "Microservices": ["microservices"],
+}
+
+_ALIASES = {alias: name for name, aliases in SKILLS.items() for alias in aliases}
+# Longest aliases first so "spark sql" wins over "spark"; "+", "#" and "/" count as word characters
+SKILL_PATTERN = re.compile(
+    r"(?<![\w+#/])(" + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True)) + r")(?![\w+#])",
+    re.I
+)
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"(?<![\w/])\+?\(?\d[\d\s().-]{7,18}\d(?![\w/])")
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+DATE = rf"(?:{MONTH}\s+|(?:0?[1-9]|1[0-2])/)?(?:19|20)\d{{2}}"
+DATE_RANGE = re.compile(rf"({DATE})\s*(?:-|–|—|to|until)\s*({DATE}|present|current|now|today)", re.I)
+YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+STATED_YEARS = re.compile(r"(\d{1,2}(?:\.\d)?)\+?\s*(?:years|yrs)\b(?:\s+of)?(?:\s+\w+){0,3}?\s+experience", re.I)
+# Institutions and spelled-out degrees in any case; abbreviations only as written
+# (dotted, or followed by "in"/"of"), so "be", "ms" and "Scrum Master" don't match
+EDUCATION = re.compile(
+    r"(?i:\b(?:university|college|institute|school|academy|bachelor'?s?|masters?\s+of|master'?s\s+(?:degree|in)|"
+    r"ph\.?\s?d|mba|degree|diploma)\b)"
+    r"|\b(?:B\.?\s?Sc|M\.?\s?Sc|B\.?\s?Tech|M\.?\s?Tech|B\.\s?[AES]\.|M\.\s?[AS]\.|(?:BA|BE|BS|MA|MS)\s+(?:in|of)\b)"
+)
+SECTION = re.compile(
+    r"^(?:(?P<education>education|academic\w*|qualifications)|(?P<experience>(?:\w+\s)?experience|employment"
+    r"(?: history)?|work history)|(?P<other>projects?|skills|certifications?|publications|awards|interests))"
+    r"\s*:?$", re.I
+)
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+NOT_A_NAME = re.compile(r"resume|curriculum|vitae|profile|summary|engineer|developer|analyst|@|\d", re.I)
+
+
+def skills(text: str) -> list:
+    """Canonical names of dictionary skills mentioned in the text, in order of first mention."""
+    found = []
+    for match in SKILL_PATTERN.finditer(text):
+        name = _ALIASES[match.group(1).lower()]
+        if name not in found:
+            found.append(name)
+    return found
+
+
+def _month_index(value: str, today: date) -> int:
+    """Months since year 0 for a DATE match or present/current."""
+    value = value.strip().lower()
+    if value in ("present", "current", "now", "today"):
+        return today.year * 12 + today.month - 1
+    year = int(YEAR.search(value).group(0))
+    month = 0
+    numeric = re.match(r"(\d{1,2})/", value)
+    if numeric:
+        month = int(numeric.group(1)) - 1
+    elif value[:3] in MONTHS:
+        month = MONTHS.index(value[:3])
+    return year * 12 + month
+
+
+def _phone(text: str):
+    for match in PHONE.finditer(text):
+        candidate = match.group(0).strip()
+        digits = re.sub(r"\D", "", candidate)
+        # Skip date ranges such as "2019 - 2021" and bare years
+        if 9 <= len(digits) <= 15 and not DATE_RANGE.fullmatch(candidate):
+            return candidate
+    return None
+
+
+def _name(lines: list):
+    """First short line that looks like a person's name."""
+    for line in lines[:5]:
+        words = line.split()
+        if 2 <= len(words) <= 4 and not NOT_A_NAME.search(line) and all(w[:1].isupper() for w in words):
+            return line
+    return None
+
+
+def extract_resume_fields(text: str, today: date = None) -> dict:
+    """
+    Fields a resume states verbatim, found without the LLM.
+
+    Date ranges under an Education heading, or outside an Experience section
+    on lines naming a school or degree, count as education; those under
+    other non-experience headings (projects, certifications) are ignored;
+    the rest (including jobs at a university) are merged, overlaps counted
+    once, into experience_years, unless the resume states its years of
+    experience outright.
+
+    Returns:
+        {"name", "email", "phone", "skills", "experience_years",
+         "experience": [{"title", "company", "duration", "highlights"}],
+         "education": [{"degree", "institution", "year"}]}
+    """
+    today = today or date.today()
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    email = EMAIL.search(text or "")
+
+    intervals = []
+    experience = []
+    education = []
+    section = None
+    for line in lines:
+        heading = SECTION.match(line)
+        if heading:
+            section = heading.lastgroup
+            continue
+        if section == "education" or (section != "experience" and EDUCATION.search(line)):
+            years = YEAR.findall(line)
+            if years:
+                education.append({"degree": DATE_RANGE.sub("", line).strip(" |,-–—"), "institution": None,
+                                  "year": years[-1]})
+            continue
+        if section == "other":
+            continue
+        for match in DATE_RANGE.finditer(line):
+            start, end = _month_index(match.group(1), today), _month_index(match.group(2), today)
+            if start <= end:
+                intervals.append((start, end + 1))
+                experience.append({"title": DATE_RANGE.sub("", line).strip(" |,-–—") or None,
+                                   "company": None, "duration": match.group(0), "highlights": []})
+
+    months = 0
+    current_end = None
+    for start, end in sorted(intervals):
+        if current_end is not None and start < current_end:
+            start = current_end
+        if end > start:
+            months += end - start
+            current_end = end if current_end is None else max(current_end, end)
+    stated = STATED_YEARS.search(text or "")
+
+    return {
+        "name": _name(lines),
+        "email": email.group(0) if email else None,
+        "phone": _phone(text or ""),
+        "skills": skills(text or ""),
+        "experience_years": float(stated.group(1)) if stated else round(months / 12, 1),
+        "experience": experience,
+        "education": education
+    }
@@ -3,71 +3,165 @@ Resume Parser
 Extracts structured information from PDF/DOCX resumes using LLM
 """
 
+import asyncio
+import io
+import multiprocessing
 import os
-import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
-import tempfile
 
+from .json_extract import extract_json
+from .llm_cache import discard_completion
+from .parse_cache import file_key, get_parse_cache, template_version
+from .prompt_budget import fit
+from .resume_fields import FIELDS_VERSION, extract_resume_fields
+from .telemetry import probe
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+# Page count from which PDFs are extracted in parallel, and the worker count
+PDF_PARALLEL_PAGES = int(os.environ.get("MOCKMENTOR_PDF_PARALLEL_PAGES", "10"))
+PDF_WORKERS = int(os.environ.get("MOCKMENTOR_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def _table_text(page) -> str:
     """
-    Extract text from PDF file bytes.
-    Uses pdfplumber with fallback to pypdf for complex PDFs.
+    Text of the tables on a page, or "" when the page has no ruling lines.
+    
+    pdfplumber's default table finder builds cells from ruling lines, so a
+    page without both horizontal and vertical edges cannot yield a table
+    and the (slow) extract_tables() call is skipped.
     """
+    if not page.horizontal_edges or not page.vertical_edges:
+        return ""
+    table_text = ""
+    for table in page.extract_tables():
+        for row in table:
+            if row:
+                row_text = " | ".join([str(cell) if cell else "" for cell in row])
+                table_text += row_text + "\n"
+    return table_text
+
+
+def _page_texts(pdf_pages) -> list:
+    """Text (with table rows) of each non-empty page, in order."""
+    pages = []
+    for page in pdf_pages:
+        # Try standard text extraction
+        page_text = page.extract_text()
+        
+        # Tables only where the page has ruling lines
+        table_text = _table_text(page)
+        
+        text_parts = [part for part in (page_text, table_text) if part]
+        if text_parts:
+            pages.append("\n".join(text_parts))
+        # Release the parsed layout; long PDFs otherwise keep every page in memory
+        page.close()
+    return pages
+
+
+def _extract_page_range(file_bytes: bytes, start: int, stop: int) -> list:
+    """_page_texts of pages [start, stop) (runs in pool workers)."""
     import pdfplumber
     
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-        tmp.write(file_bytes)
-        tmp_path = tmp.name
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        return _page_texts(pdf.pages[start:stop])
+
+
+_pdf_pool = None
+_pdf_pool_workers = 0
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool for page extraction, started on first use and
+    restarted when a different worker count is asked for.
     
-    try:
-        text_parts = []
-        
-        with pdfplumber.open(tmp_path) as pdf:
-            for page in pdf.pages:
-                # Try standard text extraction
-                page_text = page.extract_text()
-                
-                # Also try extracting tables
-                tables = page.extract_tables()
-                table_text = ""
-                for table in tables:
-                    for row in table:
-                        if row:
-                            row_text = " | ".join([str(cell) if cell else "" for cell in row])
-                            table_text += row_text + "\n"
-                
-                if page_text:
-                    text_parts.append(page_text)
-                if table_text:
-                    text_parts.append(table_text)
-        
-        text = "\n".join(text_parts).strip()
-        
-        # If pdfplumber failed to get much text, try pypdf as fallback
-        if len(text) < 100:
+    Workers are started by a fork server (spawned where there is none):
+    forking the multi-threaded Streamlit/asyncio process directly can copy
+    a held lock (e.g. pdfminer's logging lock) into the child and deadlock.
+    """
+    global _pdf_pool, _pdf_pool_workers
+    with _pdf_pool_lock:
+        if _pdf_pool is not None and _pdf_pool_workers != workers:
+            _pdf_pool.shutdown(wait=False)
+            _pdf_pool = None
+        if _pdf_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _pdf_pool_workers = workers
+        return _pdf_pool
+
+
+def _reset_pdf_pool() -> None:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+def _extract_pages_parallel(file_bytes: bytes, page_count: int, workers: int) -> list:
+    """Split pages into one contiguous range per worker and merge in page order."""
+    size = -(-page_count // workers)
+    ranges = [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+    pool = _get_pdf_pool(workers)
+    futures = [pool.submit(_extract_page_range, file_bytes, start, stop) for start, stop in ranges]
+    return [part for future in futures for part in future.result()]
+
+
+def extract_text_from_pdf(file_bytes: bytes, workers: int = None) -> str:
+    """
+    Extract text from PDF file bytes, pages separated by form feeds.
+    Uses pdfplumber with fallback to pypdf for complex PDFs, both reading
+    from the same in-memory buffer. PDFs of at least PDF_PARALLEL_PAGES
+    pages are split across a process pool of `workers` (default
+    PDF_WORKERS) processes.
+    """
+    import pdfplumber
+    
+    buffer = io.BytesIO(file_bytes)
+    workers = workers or PDF_WORKERS
+    
+    with pdfplumber.open(buffer) as pdf:
+        page_count = len(pdf.pages)
+        pages = None
+        if workers > 1 and page_count >= PDF_PARALLEL_PAGES:
             try:
-                from pypdf import PdfReader
-                reader = PdfReader(tmp_path)
-                fallback_text = ""
-                for page in reader.pages:
-                    fallback_text += page.extract_text() + "\n"
-                if len(fallback_text) > len(text):
-                    text = fallback_text.strip()
-            except ImportError:
-                pass  # pypdf not installed, continue with pdfplumber result
-            except Exception:
-                pass  # pypdf failed, continue with pdfplumber result
-        
-        return text
-    finally:
-        os.unlink(tmp_path)
+                pages = _extract_pages_parallel(file_bytes, page_count, workers)
+            except (BrokenProcessPool, OSError):
+                _reset_pdf_pool()  # A worker died or couldn't start; extract serially
+        if pages is None:
+            # Short PDFs (the usual resume) are read from this one open document
+            pages = _page_texts(pdf.pages)
+    
+    # Page breaks let compact() tell repeated headers/footers from repeated content
+    text = "\f".join(pages).strip()
+    
+    # If pdfplumber failed to get much text, try pypdf as fallback
+    if len(text) < 100:
+        try:
+            from pypdf import PdfReader
+            buffer.seek(0)
+            reader = PdfReader(buffer)
+            fallback_text = ""
+            for page in reader.pages:
+                fallback_text += page.extract_text() + "\f"
+            if len(fallback_text) > len(text):
+                text = fallback_text.strip()
+        except ImportError:
+            pass  # pypdf not installed, continue with pdfplumber result
+        except Exception:
+            pass  # pypdf failed, continue with pdfplumber result
+    
+    return text
 
 
 def extract_text_from_docx(file_bytes: bytes) -> str:
     """Extract text from DOCX file bytes."""
     from docx import Document
-    import io
     
     doc = Document(io.BytesIO(file_bytes))
     text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
@@ -90,45 +184,59 @@ def extract_text(file_bytes: bytes, filename: str) -> str:
             raise ValueError(f"Unsupported file format: {ext}")
 
 
-def parse_resume_with_llm(resume_text: str) -> dict:
+def _merge_skills(skills: list, projects: list) -> list:
+    """Dictionary skills plus project technologies the dictionary doesn't know."""
+    merged = list(skills)
+    seen = {skill.lower() for skill in skills}
+    for project in projects:
+        if not isinstance(project, dict):
+            continue
+        for tech in project.get("technologies") or []:
+            if isinstance(tech, str) and tech.strip() and tech.strip().lower() not in seen:
+                seen.add(tech.strip().lower())
+                merged.append(tech.strip())
+    return merged
+
+
+def _with_local_dates(entries: list, local_entries: list, date_key: str, label_key: str, name_keys: tuple) -> list:
     """
-    Use LLM to extract structured information from resume text.
-    
-    Returns:
-        {
-            "name": str,
-            "email": str,
-            "phone": str,
-            "skills": [str],
-            "experience_years": float,
-            "experience": [{"title": str, "company": str, "duration": str, "highlights": [str]}],
-            "education": [{"degree": str, "institution": str, "year": str}],
-            "projects": [{"name": str, "description": str, "technologies": [str]}],
-            "summary": str
-        }
+    Model-read entries with `date_key` taken from the locally extracted
+    entry whose line names them (see resume_fields), or from the entry at
+    the same position when both found as many; None when neither matches.
     """
-    from .tools import get_eval_model
-    
-    model = get_eval_model()
-    
-    prompt = f"""
+    entries = [entry for entry in entries if isinstance(entry, dict)]
+    unused = list(range(len(local_entries)))
+    merged = []
+    for i, entry in enumerate(entries):
+        names = [str(entry.get(key) or "").lower() for key in name_keys]
+        match = next((j for j in unused if any(
+            name and name in (local_entries[j].get(label_key) or "").lower() for name in names
+        )), None)
+        if match is None and len(entries) == len(local_entries) and i in unused:
+            match = i
+        if match is not None:
+            unused.remove(match)
+        merged.append({**entry, date_key: local_entries[match][date_key] if match is not None else None})
+    return merged
+
+
+RESUME_PROMPT = """
     Extract structured information from this resume. Return ONLY valid JSON.
     
     Resume:
-    {resume_text[:8000]}  # Truncate to avoid token limits
+    {resume_text}
+    
+    Contact details, skills, years of experience and the dates of jobs and
+    degrees are extracted separately; do not return them.
     
     Return JSON with this exact structure:
     {{
         "name": "Full Name",
-        "email": "email@example.com",
-        "phone": "phone number or null",
-        "skills": ["skill1", "skill2", ...],
-        "experience_years": 0.0,
         "experience": [
-            {{"title": "Job Title", "company": "Company", "duration": "2020-2023", "highlights": ["achievement1"]}}
+            {{"title": "Job Title", "company": "Company", "highlights": ["achievement1"]}}
         ],
         "education": [
-            {{"degree": "Degree Name", "institution": "University", "year": "2020"}}
+            {{"degree": "Degree Name", "institution": "University"}}
         ],
         "projects": [
             {{"name": "Project", "description": "What it does", "technologies": ["tech1"]}}
@@ -138,48 +246,106 @@ def parse_resume_with_llm(resume_text: str) -> dict:
     
     If any field is not found, use null or empty array. Return ONLY the JSON, no markdown.
     """
+
+
+async def aparse_resume_with_llm(resume_text: str) -> dict:
+    """
+    Async variant of parse_resume_with_llm.
+    """
+    from .tools import get_eval_model
     
-    try:
-        response = model.generate(prompt)
-        text = response.text.strip()
-        
-        # Clean up potential markdown formatting safely
-        if "```" in text:
-            parts = text.split("```")
-            if len(parts) >= 2:
-                text = parts[1]
-                if text.startswith("json"):
-                    text = text[4:]
-        
-        # Find JSON object in the text
-        text = text.strip()
-        if "{" in text:
-            start = text.index("{")
-            end = text.rfind("}") + 1
-            if end > start:
-                text = text[start:end]
-        
-        return json.loads(text)
-    except Exception as e:
-        # Return minimal structure on error
-        return {
-            "name": "Unknown",
-            "email": None,
-            "phone": None,
-            "skills": [],
-            "experience_years": 0,
-            "experience": [],
-            "education": [],
-            "projects": [],
-            "summary": f"Failed to parse resume: {str(e)}",
-            "raw_text": resume_text[:2000]
+    model = get_eval_model()
+    
+    # Regex/dictionary fields first; the model only handles what needs reading
+    local = extract_resume_fields(resume_text)
+    prompt = RESUME_PROMPT.format(resume_text=fit(resume_text, 'resume'))
+    
+    with probe("resume") as call:
+        try:
+            response = await model.agenerate(prompt)
+            parsed = extract_json(response.text, dict)
+        except Exception as e:
+            call.fell_back(e)
+            await discard_completion(model, prompt)
+            # Fall back to the locally extracted fields
+            return {
+                **local,
+                "name": local["name"] or "Unknown",
+                "projects": [],
+                "summary": f"Failed to parse resume: {str(e)}",
+                "raw_text": resume_text[:2000],
+                "parse_error": str(e)
+            }
+    
+    return {
+        "name": parsed.get("name") or local["name"] or "Unknown",
+        "email": local["email"],
+        "phone": local["phone"],
+        "skills": _merge_skills(local["skills"], parsed.get("projects") or []),
+        "experience_years": local["experience_years"],
+        "experience": _with_local_dates(parsed.get("experience") or [], local["experience"],
+                                        "duration", "title", ("company", "title")) or local["experience"],
+        "education": _with_local_dates(parsed.get("education") or [], local["education"],
+                                       "year", "degree", ("institution", "degree")) or local["education"],
+        "projects": parsed.get("projects") or [],
+        "summary": parsed.get("summary")
+    }
+
+
+def parse_resume_with_llm(resume_text: str) -> dict:
+    """
+    Use LLM to extract structured information from resume text.
+    
+    Email, phone, skills, experience years and the dates of jobs and
+    degrees come from regexes and a skills dictionary (see resume_fields);
+    the model reads the rest. If
+    the model fails, the locally extracted fields are returned.
+    
+    Returns:
+        {
+            "name": str,
+            "email": str,
+            "phone": str,
+            "skills": [str],
+            "experience_years": float,
+            "experience": [{"title": str, "company": str, "duration": str, "highlights": [str]}],
+            "education": [{"degree": str, "institution": str, "year": str}],
+            "projects": [{"name": str, "description": str, "technologies": [str]}],
+            "summary": str
         }
+    """
+    from .models import run_sync
+    
+    return run_sync(aparse_resume_with_llm(resume_text))
+
+
+async def aparse_resume(file_bytes: bytes, filename: str) -> dict:
+    """
+    Async variant of parse_resume; text extraction runs in a worker thread.
+    """
+    cache = get_parse_cache()
+    key = file_key(file_bytes, filename)
+    version = template_version(RESUME_PROMPT + FIELDS_VERSION)
+    if cache is not None:
+        parsed = await asyncio.to_thread(cache.get, "resume", key, version)
+        if parsed is not None:
+            return parsed
+    
+    text = await asyncio.to_thread(extract_text, file_bytes, filename)
+    parsed = await aparse_resume_with_llm(text)
+    parsed["raw_text"] = text
+    if cache is not None and "parse_error" not in parsed:
+        await asyncio.to_thread(cache.put, "resume", key, version, parsed)
+    return parsed
 
 
 def parse_resume(file_bytes: bytes, filename: str) -> dict:
     """
     Main entry point: extract text and parse with LLM.
     
+    Byte-identical files are answered from the parse cache (see
+    parse_cache) until the prompt template or model changes.
+    
     Args:
         file_bytes: Raw file bytes
         filename: Original filename (for extension detection)
@@ -187,7 +353,6 @@ def parse_resume(file_bytes: bytes, filename: str) -> dict:
     Returns:
         Structured resume data dict
     """
-    text = extract_text(file_bytes, filename)
-    parsed = parse_resume_with_llm(text)
-    parsed["raw_text"] = text
-    return parsed
+    from .models import run_sync
+    
+    return run_sync(aparse_resume(file_bytes, filename))
@@ -0,0 +1,290 @@
+"""
+Provider Routing
+Hedged requests, failover and circuit breakers across Groq and Gemini
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from .models import DEFAULT_MODEL_NAMES, TextResponse, get_text_model, resolve_model, run_sync
+
+
+PROVIDER_KEYS = {
+    "groq": ("GROQ_API_KEY",),
+    "gemini": ("GOOGLE_API_KEY", "GEMINI_API_KEY"),
+}
+# Template values such as .env.example's "your_groq_api_key_here"
+PLACEHOLDER_KEY = re.compile(r"^(your[_-]|<)|_here$|placeholder|changeme|^x+$", re.I)
+
+HEDGE_ENABLED = os.environ.get("MOCKMENTOR_HEDGE", "1").lower() not in ("0", "false", "off")
+HEDGE_PERCENTILE = float(os.environ.get("MOCKMENTOR_HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("MOCKMENTOR_HEDGE_DEFAULT_DELAY", "3.0"))
+HEDGE_MIN_DELAY = float(os.environ.get("MOCKMENTOR_HEDGE_MIN_DELAY", "0.5"))
+BREAKER_FAILURES = int(os.environ.get("MOCKMENTOR_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.environ.get("MOCKMENTOR_BREAKER_RESET", "30"))
+
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies for one provider."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float):
+        """Latency at `pct`, or None until enough samples are collected."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * pct / 100))
+        return samples[index]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker.
+
+    Opens after `failures` errors in a row and rejects calls for `reset`
+    seconds; then lets a single trial call through (half-open) and closes
+    again if it succeeds.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET):
+        self.failures = failures
+        self.reset = reset
+        self._errors = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._errors = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release(self) -> None:
+        """Give back a half-open trial whose call was cancelled."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._errors += 1
+            if self._trial or self._errors >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class RoutedModel:
+    """
+    Text model that spreads one logical call over several providers.
+
+    The preferred provider is called first. If it has not answered after its
+    p95 latency, a hedged request goes to the next provider; the first
+    successful answer wins and the other request is cancelled. Errors fail
+    over immediately, and providers whose breaker is open are skipped.
+    """
+
+    def __init__(self, models: list):
+        self.models = models
+        self.provider = models[0].provider
+        self.model_name = models[0].model_name
+        self.latency = {m.provider: LatencyTracker() for m in models}
+        self.breakers = {m.provider: CircuitBreaker() for m in models}
+        self.counters = {"calls": 0, "hedges": 0, "hedge_wins": 0, "failovers": 0}
+
+    def hedge_delay(self, provider: str) -> float:
+        p95 = self.latency[provider].percentile(HEDGE_PERCENTILE)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, p95)
+
+    def _take(self, candidates: list):
+        """Pop the next candidate whose breaker lets a call through."""
+        while candidates:
+            model = candidates.pop(0)
+            if self.breakers[model.provider].allow():
+                return model
+        return None
+
+    async def _call(self, model, prompt: str, params: dict) -> TextResponse:
+        started = time.monotonic()
+        try:
+            response = await model.agenerate(prompt, **params)
+        except asyncio.CancelledError:
+            self.breakers[model.provider].release()
+            raise
+        except Exception:
+            self.breakers[model.provider].record_failure()
+            raise
+        self.breakers[model.provider].record_success()
+        self.latency[model.provider].add(time.monotonic() - started)
+        return response
+
+    async def agenerate(self, prompt: str, **params) -> TextResponse:
+        self.counters["calls"] += 1
+        candidates = list(self.models)
+        tasks = {}
+        error = None
+        hedged = False
+
+        def launch(model):
+            tasks[asyncio.ensure_future(self._call(model, prompt, params))] = model
+
+        # With every breaker open, still try the preferred provider
+        launch(self._take(candidates) or self.models[0])
+        first = next(iter(tasks))
+        try:
+            while tasks:
+                timeout = None
+                if candidates and len(tasks) == 1:
+                    timeout = self.hedge_delay(next(iter(tasks.values())).provider)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    model = self._take(candidates)
+                    if model is not None:
+                        self.counters["hedges"] += 1
+                        hedged = True
+                        launch(model)
+                    continue
+                for task in done:
+                    tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged and task is not first:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+                if not tasks:
+                    model = self._take(candidates)
+                    if model is not None:
+                        self.counters["failovers"] += 1
+                        launch(model)
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise error
+
+    async def astream(self, prompt: str, **params):
+        """Stream from the first healthy provider, failing over until output starts."""
+        candidates = list(self.models)
+        model = self._take(candidates) or self.models[0]
+        while model is not None:
+            started = False
+            try:
+                async for chunk in model.astream(prompt, **params):
+                    started = True
+                    yield chunk
+            except Exception:
+                self.breakers[model.provider].record_failure()
+                model = self._take(candidates)
+                if started or model is None:
+                    raise
+                self.counters["failovers"] += 1
+                continue
+            self.breakers[model.provider].record_success()
+            return
+
+    def generate(self, prompt: str, **params) -> TextResponse:
+        return run_sync(self.agenerate(prompt, **params))
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "providers": {
+                m.provider: {
+                    "breaker": self.breakers[m.provider].state,
+                    "p95_seconds": self.latency[m.provider].percentile(95),
+                    "hedge_delay": self.hedge_delay(m.provider)
+                }
+                for m in self.models
+            }
+        }
+
+
+def has_api_key(provider: str) -> bool:
+    """True when one of the provider's key variables holds a real (non-placeholder) value."""
+    return any(
+        (os.environ.get(key) or "").strip() and not PLACEHOLDER_KEY.search(os.environ[key].strip())
+        for key in PROVIDER_KEYS.get(provider, ())
+    )
+
+
+def configured_providers() -> list:
+    """
+    Preferred provider (MODEL_PROVIDER) first, then fallbacks for hedging:
+    those listed in MOCKMENTOR_FALLBACK_PROVIDERS (comma-separated) when
+    set, otherwise every other provider with a real API key. Fallbacks
+    whose key is missing or a placeholder are never used.
+    """
+    primary = resolve_model()[0]
+    if primary == "local":
+        return [primary]
+    listed = os.environ.get("MOCKMENTOR_FALLBACK_PROVIDERS")
+    if listed is not None:
+        others = [p.strip().lower() for p in listed.split(",") if p.strip()]
+    else:
+        others = list(PROVIDER_KEYS)
+    fallbacks = []
+    for provider in others:
+        if provider != primary and provider not in fallbacks and has_api_key(provider):
+            fallbacks.append(provider)
+    return [primary] + fallbacks
+
+
+_routed = None
+_routed_lock = threading.Lock()
+
+
+def get_routed_model():
+    """
+    Return the shared hedging router, or the plain primary model when only
+    one provider is configured or MOCKMENTOR_HEDGE=0.
+    """
+    global _routed
+    providers = configured_providers() if HEDGE_ENABLED else []
+    if len(providers) < 2:
+        return get_text_model()
+    with _routed_lock:
+        if _routed is None:
+            # MODEL_NAME applies to the preferred provider; others use their defaults
+            models = [get_text_model()] + [
+                get_text_model(p, DEFAULT_MODEL_NAMES[p]) for p in providers[1:]
+            ]
+            _routed = RoutedModel(models)
+        return _routed
+
+
+def get_routing_stats() -> dict:
+    """Hedge/failover counters and per-provider breaker state; empty when not routing."""
+    return _routed.stats() if _routed else {}
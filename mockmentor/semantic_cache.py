@@ -0,0 +1,262 @@
+"""
+Semantic Evaluation Cache
+Reuses the grade of a near-duplicate answer to the same bank question
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # Cache is disabled without NumPy
+    np = None
+
+from .coverage import STEM_LENGTH, keywords
+from .pregrader import PHRASE
+
+
+DEFAULT_SEMANTIC_PATH = os.environ.get("MOCKMENTOR_SEMANTIC_CACHE_PATH", "mockmentor_semantic_cache.db")
+DEFAULT_THRESHOLD = float(os.environ.get("MOCKMENTOR_SEMANTIC_THRESHOLD", "0.95"))
+DEFAULT_TTL_SECONDS = float(os.environ.get("MOCKMENTOR_SEMANTIC_CACHE_TTL", str(30 * 24 * 3600)))
+DEFAULT_MAX_PER_QUESTION = int(os.environ.get("MOCKMENTOR_SEMANTIC_CACHE_PER_QUESTION", "200"))
+
+DIMENSIONS = 4096
+NGRAM_SIZES = (3, 4, 5)
+# Answers shorter than this are too generic to match ("I don't know")
+MIN_ANSWER_CHARS = 40
+# Kept in signatures whatever the question, since they flip a statement's meaning
+NEGATIONS = {"no", "not", "never", "none", "without", "cannot", "doesn", "don", "isn", "aren", "won", "can"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS graded_answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    result TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_graded_answers_signature ON graded_answers (question_id, signature, version);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('stale', 0);
+"""
+
+
+def grader_version(*parts) -> str:
+    """Short hash of whatever a grade depends on (question, rubric, model)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def question_terms(*ideal_points) -> frozenset:
+    """
+    Keyword stems of a question's ideal points (stopwords excluded, see
+    coverage.keywords) plus their multi-word code terms ("union all").
+    """
+    phrases = {p.lower() for point in ideal_points for p in PHRASE.findall(point) if " " in p}
+    return frozenset(stem for point in ideal_points for stem in keywords(point)) | phrases
+
+
+def signature(answer: str, terms: frozenset) -> str:
+    """
+    The question's key terms and any negations, in the order the answer
+    uses them; other words ("the", "all" vs "every") don't affect it.
+    Answers that swap terms ("UNION keeps duplicates, UNION ALL removes
+    them") embed almost identically but differ here.
+    """
+    text = (answer or "").lower()
+    for phrase in sorted((t for t in terms if " " in t), key=len, reverse=True):
+        text = re.sub(r"\b" + r"\s+".join(map(re.escape, phrase.split())) + r"\b", phrase.replace(" ", "_"), text)
+    words = []
+    for word in re.findall(r"[a-z0-9_]+", text):
+        if word.replace("_", " ") in terms or word in NEGATIONS:
+            words.append(word)
+        elif word[:STEM_LENGTH] in terms:
+            words.append(word[:STEM_LENGTH])
+    return " ".join(words)
+
+
+def embed(text: str):
+    """
+    Hashed character n-gram embedding, L2-normalised.
+
+    Lower-cased, punctuation-free text is split into 3-5 character n-grams
+    (within and across word boundaries) hashed into DIMENSIONS buckets with
+    sublinear term frequency, so paraphrases with the same wording overlap.
+    """
+    normalized = " " + " ".join(re.findall(r"[a-z0-9]+", (text or "").lower())) + " "
+    counts = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(normalized) - n + 1):
+            bucket = zlib.crc32(normalized[i:i + n].encode("utf-8")) % DIMENSIONS
+            counts[bucket] = counts.get(bucket, 0) + 1
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    if counts:
+        buckets = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        vector[buckets] = 1.0 + np.log(values)
+        vector /= np.linalg.norm(vector)
+    return vector
+
+
+class SemanticCache:
+    """
+    Per-question store of graded answers.
+
+    A grade is reused only for an answer with the same term signature (see
+    `signature`) whose embedding is at least `threshold` similar. Entries
+    live in SQLite, shared across worker processes; each lookup reads the
+    few entries with a matching signature, so grades added by other
+    processes are seen at once. An entry is stale once it is older than
+    `ttl_seconds` or was graded under a different version (question text,
+    ideal points, rubric or model changed); stale entries are never reused.
+    """
+
+    def __init__(self, path: str = DEFAULT_SEMANTIC_PATH, threshold: float = DEFAULT_THRESHOLD,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, max_per_question: int = DEFAULT_MAX_PER_QUESTION):
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_per_question = max_per_question
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._similarities = []
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, name: str) -> None:
+        self._conn().execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+    def lookup(self, question_id: str, version: str, answer: str, terms: frozenset = frozenset()):
+        """
+        Grade of the most similar previously graded answer, if close enough.
+
+        Args:
+            terms: The question's vocabulary (see `question_terms`)
+
+        Returns:
+            (result dict, similarity) on a hit, None on a miss
+        """
+        if len(answer or "") < MIN_ANSWER_CHARS:
+            return None
+        rows = self._conn().execute(
+            "SELECT version, vector, result, created FROM graded_answers "
+            "WHERE question_id = ? AND signature = ?",
+            (question_id, signature(answer, terms))
+        ).fetchall()
+        if not rows:
+            self._bump("misses")
+            return None
+        matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        similarities = matrix @ embed(answer)
+        now = time.time()
+        fresh = [i for i, row in enumerate(rows) if row[0] == version and now - row[3] <= self.ttl_seconds]
+        best = max(fresh, key=lambda i: similarities[i]) if fresh else None
+        if best is None or similarities[best] < self.threshold:
+            # A near match that is only outdated or expired counts as stale
+            self._bump("stale" if float(similarities.max()) >= self.threshold else "misses")
+            return None
+        similarity = float(similarities[best])
+        self._bump("hits")
+        with self._lock:
+            self._similarities = (self._similarities + [similarity])[-1000:]
+        return json.loads(rows[best][2]), similarity
+
+    def add(self, question_id: str, version: str, answer: str, result: dict,
+            terms: frozenset = frozenset()) -> None:
+        """Index a freshly graded answer, keeping the newest max_per_question."""
+        if len(answer or "") < MIN_ANSWER_CHARS:
+            return
+        vector = embed(answer)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO graded_answers (question_id, version, signature, vector, result, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (question_id, version, signature(answer, terms), vector.tobytes(), json.dumps(result), now)
+            )
+            conn.execute(
+                "DELETE FROM graded_answers WHERE question_id = ? AND id NOT IN "
+                "(SELECT id FROM graded_answers WHERE question_id = ? ORDER BY id DESC LIMIT ?)",
+                (question_id, question_id, self.max_per_question)
+            )
+            conn.execute("DELETE FROM graded_answers WHERE created < ?", (now - self.ttl_seconds,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        """Hit/miss/stale counters, threshold and index size."""
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        entries, questions, oldest = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT question_id), MIN(created) FROM graded_answers"
+        ).fetchone()
+        lookups = counters["hits"] + counters["misses"] + counters["stale"]
+        with self._lock:
+            similarities = list(self._similarities)
+        return {
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "stale": counters["stale"],
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": entries,
+            "questions": questions,
+            "oldest_age_seconds": round(time.time() - oldest, 1) if oldest else None,
+            "mean_hit_similarity": round(sum(similarities) / len(similarities), 4) if similarities else None
+        }
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM graded_answers")
+        conn.execute("UPDATE counters SET value = 0")
+        with self._lock:
+            self._similarities = []
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """
+    Return the process-wide semantic cache, or None when disabled with
+    MOCKMENTOR_SEMANTIC_CACHE=0 or when NumPy is not installed.
+    """
+    global _cache
+    if np is None or os.environ.get("MOCKMENTOR_SEMANTIC_CACHE", "1").lower() in ("0", "false", "off"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticCache()
+        return _cache
+
+
+def get_semantic_cache_stats() -> dict:
+    """Hit rate and staleness of the semantic cache; empty when it is disabled."""
+    cache = get_semantic_cache()
+    return cache.stats() if cache else {}
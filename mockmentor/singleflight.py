@@ -0,0 +1,207 @@
+"""
+Single-Flight
+Coalesces identical concurrent LLM requests into one in-flight call
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process coalescing only
+    fcntl = None
+
+
+SINGLEFLIGHT_ENABLED = os.environ.get("MOCKMENTOR_SINGLEFLIGHT", "1").lower() not in ("0", "false", "off")
+# Directory for cross-process lock files; unset keeps coalescing in-process
+LOCK_DIR = os.environ.get("MOCKMENTOR_SINGLEFLIGHT_LOCK_DIR") or None
+LOCK_TIMEOUT = float(os.environ.get("MOCKMENTOR_SINGLEFLIGHT_LOCK_TIMEOUT", "120"))
+LOCK_POLL = 0.1
+
+# Leader was cancelled: followers make the call themselves
+_RETRY = object()
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time; concurrent callers with the same key
+    wait for it and share its result (or exception).
+
+    Callers may run on different event loops (Streamlit reruns each get
+    their own thread), so waiters share a concurrent.futures.Future rather
+    than an asyncio one. With `lock_dir`, the leader also holds a per-key
+    lock file while calling and while `store` saves the result (e.g. to a
+    shared cache), and `recheck` (a lookup in that cache) lets leaders in
+    other processes pick up the result instead of calling.
+    """
+
+    def __init__(self, lock_dir: str = LOCK_DIR, lock_timeout: float = LOCK_TIMEOUT):
+        self.lock_dir = lock_dir
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._counts = {"calls": 0, "coalesced": 0, "rechecked": 0, "lock_timeouts": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    async def do(self, key: str, call, recheck=None, store=None):
+        """
+        Run `call()` (a coroutine function) once for all concurrent callers of `key`.
+
+        Args:
+            key: Request identity, e.g. a prompt hash
+            call: Coroutine function making the request
+            recheck: Optional coroutine function returning a result produced
+                by another process meanwhile, or None
+            store: Optional coroutine function saving the call's result where
+                `recheck` finds it; runs before the lock is released
+
+        Returns:
+            (result, coalesced) where coalesced is True for waiters that
+            did not make the call themselves
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = concurrent.futures.Future()
+            if leader:
+                break
+            # Shielded: a waiter being cancelled must not cancel the shared future
+            result = await asyncio.shield(asyncio.wrap_future(flight))
+            if result is not _RETRY:
+                self._count("coalesced")
+                return result, True
+
+        try:
+            result, coalesced = await self._lead(key, call, recheck, store)
+        except asyncio.CancelledError:
+            flight.set_result(_RETRY)
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+        return result, coalesced
+
+    async def _lead(self, key: str, call, recheck, store):
+        if self.lock_dir is None or fcntl is None:
+            self._count("calls")
+            return await call(), False
+        os.makedirs(self.lock_dir, exist_ok=True)
+        with open(os.path.join(self.lock_dir, key[:40] + ".lock"), "a") as lock_file:
+            locked = await self._acquire(lock_file)
+            try:
+                if recheck is not None:
+                    result = await recheck()
+                    if result is not None:
+                        self._count("rechecked")
+                        return result, True
+                self._count("calls")
+                result = await call()
+                if store is not None:
+                    await store(result)
+                return result, False
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def _acquire(self, lock_file) -> bool:
+        """Poll for the lock without blocking the event loop; give up after lock_timeout."""
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self._count("lock_timeouts")
+                    return False
+                await asyncio.sleep(LOCK_POLL)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = len(self._flights)
+        requests = counts["calls"] + counts["coalesced"] + counts["rechecked"]
+        return {
+            **counts,
+            "in_flight": in_flight,
+            "saved_rate": (counts["coalesced"] + counts["rechecked"]) / requests if requests else 0.0,
+            "cross_process": self.lock_dir is not None and fcntl is not None
+        }
+
+
+class SingleFlightModel:
+    """
+    Wraps a text model so identical concurrent `agenerate` calls (same
+    provider, model, prompt and params) share one request. With a completion
+    cache, leaders in other processes find the first one's result there:
+    the leader stores it before releasing its lock. Streaming and other
+    attributes pass through.
+    """
+
+    def __init__(self, model, flights: SingleFlight, cache=None):
+        self.model = model
+        self.flights = flights
+        self.cache = cache
+
+    async def agenerate(self, prompt: str, **params):
+        from .llm_cache import cache_key
+        from .models import TextResponse
+        from .telemetry import report_usage
+
+        key = cache_key(self.model.provider, self.model.model_name, prompt, params)
+
+        async def recheck():
+            if self.cache is None:
+                return None
+            text = await asyncio.to_thread(self.cache.get, key, False)
+            return TextResponse(text, cached=True) if text is not None else None
+
+        async def store(response):
+            if self.cache is not None and response.text:
+                await asyncio.to_thread(self.cache.put, key, response.text)
+                response.stored = True
+
+        response, coalesced = await self.flights.do(
+            key, lambda: self.model.agenerate(prompt, **params), recheck, store
+        )
+        if coalesced:
+            report_usage(self.model.provider, prompt, response.text, cached=True)
+        return response
+
+    def generate(self, prompt: str, **params):
+        from .models import run_sync
+        return run_sync(self.agenerate(prompt, **params))
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+_flights = None
+_flights_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """Return the process-wide single-flight group."""
+    global _flights
+    with _flights_lock:
+        if _flights is None:
+            _flights = SingleFlight()
+        return _flights
+
+
+def get_singleflight_stats() -> dict:
+    """Calls made vs. requests served by another caller's call."""
+    return get_singleflight().stats()
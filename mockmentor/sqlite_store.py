@@ -0,0 +1,359 @@
+"""
+SQLite Profile Store
+Normalized, indexed storage for profiles with a migrator from the JSON DB
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+from .store import (
+    BaseProfileStore,
+    DEFAULT_USER,
+    blend_topic_score,
+    new_user_profile,
+    rebuild_aggregates,
+    summarize_aggregates,
+    update_aggregates,
+    weakest_area
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    session_stats TEXT NOT NULL DEFAULT '{}',
+    aggregates TEXT
+);
+
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    score REAL NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_user ON history (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_history_topic ON history (user_id, topic);
+CREATE INDEX IF NOT EXISTS idx_history_question ON history (user_id, question_id);
+CREATE INDEX IF NOT EXISTS idx_history_date ON history (user_id, date);
+
+CREATE TABLE IF NOT EXISTS weak_areas (
+    user_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (user_id, topic)
+);
+
+CREATE TABLE IF NOT EXISTS questions_seen (
+    user_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+);
+
+CREATE TABLE IF NOT EXISTS question_mastery (
+    user_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    avg_confidence REAL NOT NULL DEFAULT 0,
+    last_score REAL NOT NULL DEFAULT 0,
+    last_reviewed TEXT,
+    next_review TEXT,
+    mastery_level INTEGER,
+    scores TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (user_id, question_id)
+);
+CREATE INDEX IF NOT EXISTS idx_mastery_review ON question_mastery (user_id, next_review);
+"""
+
+MASTERY_COLUMNS = (
+    "attempts", "correct_count", "avg_confidence", "last_score",
+    "last_reviewed", "next_review", "mastery_level", "scores"
+)
+
+
+def _mastery_row(data: dict) -> tuple:
+    return (
+        data.get("attempts", 0),
+        data.get("correct_count", 0),
+        data.get("avg_confidence", 0),
+        data.get("last_score", 0),
+        data.get("last_reviewed"),
+        data.get("next_review"),
+        data.get("mastery_level"),
+        json.dumps(data.get("scores", [])),
+    )
+
+
+def _mastery_dict(row: sqlite3.Row) -> dict:
+    data = {col: row[col] for col in MASTERY_COLUMNS}
+    data["scores"] = json.loads(data["scores"])
+    if data["mastery_level"] is None:
+        del data["mastery_level"]
+    return data
+
+
+class SQLiteProfileStore(BaseProfileStore):
+    """
+    Profile store backed by SQLite in WAL mode.
+
+    Each write is a single-row insert or upsert inside a short transaction,
+    and history/review queries go through indexes instead of scanning the
+    whole profile.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(users)")}
+        if "aggregates" not in columns:
+            conn.execute("ALTER TABLE users ADD COLUMN aggregates TEXT")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run a write transaction, taking the write lock up front."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def _read_transaction(self):
+        """Run several SELECTs against one consistent snapshot of the database."""
+        conn = self._conn()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def _ensure_user(self, conn: sqlite3.Connection, user_id: str) -> None:
+        conn.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+
+    def _weak_areas(self, conn: sqlite3.Connection, user_id: str) -> dict:
+        return {
+            r["topic"]: r["score"]
+            for r in conn.execute("SELECT topic, score FROM weak_areas WHERE user_id = ?", (user_id,))
+        }
+
+    def _history(self, conn: sqlite3.Connection, user_id: str) -> list:
+        return [
+            {"question_id": r["question_id"], "score": r["score"], "topic": r["topic"], "date": r["date"]}
+            for r in conn.execute(
+                "SELECT question_id, score, topic, date FROM history WHERE user_id = ? ORDER BY id",
+                (user_id,)
+            )
+        ]
+
+    def _questions_seen(self, conn: sqlite3.Connection, user_id: str) -> list:
+        return [
+            r["question_id"]
+            for r in conn.execute(
+                "SELECT question_id FROM questions_seen WHERE user_id = ? ORDER BY seq", (user_id,)
+            )
+        ]
+
+    def _aggregates(self, conn: sqlite3.Connection, user_id: str) -> dict:
+        """Return the stored aggregates, rebuilding them once for rows that predate them."""
+        row = conn.execute("SELECT aggregates FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if row is not None and row["aggregates"]:
+            return json.loads(row["aggregates"])
+        return rebuild_aggregates({
+            "history": self._history(conn, user_id),
+            "weak_areas": self._weak_areas(conn, user_id)
+        })
+
+    def user_ids(self) -> list:
+        return [row[0] for row in self._conn().execute("SELECT user_id FROM users ORDER BY user_id")]
+
+    def get_user(self, user_id: str = DEFAULT_USER) -> dict:
+        user = new_user_profile()
+        with self._read_transaction() as conn:
+            row = conn.execute("SELECT session_stats FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            if row is not None:
+                user["session_stats"].update(json.loads(row["session_stats"]))
+            user["weak_areas"] = self._weak_areas(conn, user_id)
+            user["history"] = self._history(conn, user_id)
+            user["questions_seen"] = self._questions_seen(conn, user_id)
+            user["question_mastery"] = self.get_question_mastery(user_id)
+            user["aggregates"] = self._aggregates(conn, user_id)
+        return user
+
+    def selection_state(self, user_id: str = DEFAULT_USER) -> dict:
+        with self._read_transaction() as conn:
+            return {
+                "weak_areas": self._weak_areas(conn, user_id),
+                "questions_seen": self._questions_seen(conn, user_id)
+            }
+
+    def put_user(self, user_data: dict, user_id: str = DEFAULT_USER) -> None:
+        with self._transaction() as conn:
+            for table in ("history", "weak_areas", "questions_seen", "question_mastery"):
+                conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO users (user_id, session_stats, aggregates) VALUES (?, ?, ?)",
+                (
+                    user_id,
+                    json.dumps(user_data.get("session_stats", {})),
+                    json.dumps(rebuild_aggregates(user_data))
+                )
+            )
+            conn.executemany(
+                "INSERT INTO history (user_id, question_id, topic, score, date) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (user_id, h["question_id"], h.get("topic", ""), h["score"], h.get("date", ""))
+                    for h in user_data.get("history", [])
+                ]
+            )
+            conn.executemany(
+                "INSERT INTO weak_areas (user_id, topic, score) VALUES (?, ?, ?)",
+                [(user_id, topic, score) for topic, score in user_data.get("weak_areas", {}).items()]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions_seen (user_id, question_id, seq) VALUES (?, ?, ?)",
+                [(user_id, q_id, i) for i, q_id in enumerate(user_data.get("questions_seen", []))]
+            )
+            conn.executemany(
+                f"INSERT INTO question_mastery (user_id, question_id, {', '.join(MASTERY_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(MASTERY_COLUMNS))})",
+                [
+                    (user_id, q_id) + _mastery_row(data)
+                    for q_id, data in user_data.get("question_mastery", {}).items()
+                ]
+            )
+
+    def record_answer(self, question_id: str, topic: str, score: float, date: str,
+                      user_id: str = DEFAULT_USER) -> None:
+        self.record_answers([(question_id, topic, score, date)], user_id)
+
+    def record_answers(self, answers: list, user_id: str = DEFAULT_USER) -> None:
+        with self._transaction() as conn:
+            self._ensure_user(conn, user_id)
+            aggregates = self._aggregates(conn, user_id)
+            weak_areas = self._weak_areas(conn, user_id)
+            for question_id, topic, score, date in answers:
+                weak_areas[topic] = blend_topic_score(weak_areas.get(topic, 0.5), score)
+                conn.execute(
+                    "INSERT OR REPLACE INTO weak_areas (user_id, topic, score) VALUES (?, ?, ?)",
+                    (user_id, topic, weak_areas[topic])
+                )
+                update_aggregates(aggregates, topic, score, date, weak_areas)
+                conn.execute(
+                    "INSERT INTO history (user_id, question_id, topic, score, date) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, question_id, topic, score, date)
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO questions_seen (user_id, question_id, seq) "
+                    "SELECT ?, ?, COALESCE(MAX(seq), -1) + 1 FROM questions_seen WHERE user_id = ?",
+                    (user_id, question_id, user_id)
+                )
+            conn.execute(
+                "UPDATE users SET aggregates = ? WHERE user_id = ?",
+                (json.dumps(aggregates), user_id)
+            )
+
+    def update_mastery(self, question_id: str, updater, user_id: str = DEFAULT_USER) -> dict:
+        with self._transaction() as conn:
+            self._ensure_user(conn, user_id)
+            row = conn.execute(
+                "SELECT * FROM question_mastery WHERE user_id = ? AND question_id = ?",
+                (user_id, question_id)
+            ).fetchone()
+            data = updater(_mastery_dict(row) if row else None)
+            conn.execute(
+                f"INSERT OR REPLACE INTO question_mastery (user_id, question_id, {', '.join(MASTERY_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(MASTERY_COLUMNS))})",
+                (user_id, question_id) + _mastery_row(data)
+            )
+            return data
+
+    def get_question_mastery(self, user_id: str = DEFAULT_USER) -> dict:
+        return {
+            row["question_id"]: _mastery_dict(row)
+            for row in self._conn().execute(
+                "SELECT * FROM question_mastery WHERE user_id = ?", (user_id,)
+            )
+        }
+
+    def history_summary(self, user_id: str = DEFAULT_USER) -> dict:
+        with self._read_transaction() as conn:
+            return summarize_aggregates(self._aggregates(conn, user_id))
+
+    def weakest_area(self, user_id: str = DEFAULT_USER):
+        with self._read_transaction() as conn:
+            return weakest_area(self._aggregates(conn, user_id), self._weak_areas(conn, user_id))
+
+    def recent_scores(self, limit: int = 10, user_id: str = DEFAULT_USER) -> list:
+        rows = self._conn().execute(
+            "SELECT score FROM history WHERE user_id = ? ORDER BY id DESC LIMIT ?", (user_id, limit)
+        ).fetchall()
+        return [row["score"] for row in reversed(rows)]
+
+    def not_due_question_ids(self, today: str, user_id: str = DEFAULT_USER) -> set:
+        return {
+            row["question_id"]
+            for row in self._conn().execute(
+                "SELECT question_id FROM question_mastery WHERE user_id = ? AND next_review > ?",
+                (user_id, today)
+            )
+        }
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def migrate_json_db(json_path: str, sqlite_path: str) -> int:
+    """
+    One-shot import of a `mockmentor_db.json` file into a SQLite store.
+
+    Existing rows for the imported users are replaced. Returns the number of
+    users migrated.
+    """
+    with open(json_path, "r") as f:
+        data = json.load(f)
+
+    store = SQLiteProfileStore(sqlite_path)
+    try:
+        for user_id, user_data in data.items():
+            store.put_user(user_data, user_id)
+    finally:
+        store.close()
+    return len(data)
+
+
+if __name__ == "__main__":
+    # Usage: python -m mockmentor.sqlite_store [mockmentor_db.json] [mockmentor.db]
+    src = sys.argv[1] if len(sys.argv) > 1 else "mockmentor_db.json"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "mockmentor.db"
+    if not os.path.exists(src):
+        sys.exit(f"No JSON DB found at {src}")
+    count = migrate_json_db(src, dst)
+    print(f"Migrated {count} user(s) from {src} to {dst}")
@@ -0,0 +1,643 @@
+"""
+Profile Store
+Keeps the profile DB in memory and persists it as snapshots plus an event journal
+"""
+
+import atexit
+import copy
+import heapq
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single process only
+    fcntl = None
+
+
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("MOCKMENTOR_FLUSH_INTERVAL", "5.0"))
+DEFAULT_SNAPSHOT_EVERY = int(os.environ.get("MOCKMENTOR_SNAPSHOT_EVERY", "200"))
+DEFAULT_MAX_USERS = int(os.environ.get("MOCKMENTOR_STORE_MAX_USERS", "256"))
+DEFAULT_USER = "default_user"
+
+
+def new_user_profile() -> dict:
+    """Return an empty profile with every field the tools expect."""
+    return {
+        "weak_areas": {},
+        "history": [],
+        "questions_seen": [],
+        "question_mastery": {},  # Per-question spaced repetition data
+        "session_stats": {
+            "total_time_seconds": 0,
+            "sessions_count": 0
+        },
+        "aggregates": new_aggregates()
+    }
+
+
+def _upgrade_user(user: dict) -> dict:
+    """Ensure new fields exist for backward compatibility."""
+    if "aggregates" not in user:
+        user["aggregates"] = rebuild_aggregates(user)
+    for key, value in new_user_profile().items():
+        if key not in user:
+            user[key] = value
+    return user
+
+
+def blend_topic_score(current: float, overall_score: float) -> float:
+    """Exponential moving average of a topic score (0-1) with a new 0-10 grade."""
+    return (current * 0.7) + ((overall_score / 10.0) * 0.3)
+
+
+# --- Running aggregates ---
+# Kept on the profile and updated with every answer so reports don't have
+# to walk the whole history.
+
+def new_aggregates() -> dict:
+    return {
+        "count": 0,
+        "score_sum": 0.0,
+        "topics": {},  # topic -> {"count": int, "sum": float}
+        "dates": {},  # date -> answers that day; its size is the session count
+        "weak_heap": []  # Lazy min-heap of [topic_score, topic]
+    }
+
+
+def _rebuild_weak_heap(aggregates: dict, weak_areas: dict) -> None:
+    aggregates["weak_heap"] = [[score, topic] for topic, score in weak_areas.items()]
+    heapq.heapify(aggregates["weak_heap"])
+
+
+def update_aggregates(aggregates: dict, topic: str, score: float, date: str,
+                      weak_areas: dict) -> None:
+    """Fold one graded answer into the aggregates; `weak_areas` is already updated."""
+    aggregates["count"] += 1
+    aggregates["score_sum"] += score
+    topic_stats = aggregates["topics"].setdefault(topic, {"count": 0, "sum": 0.0})
+    topic_stats["count"] += 1
+    topic_stats["sum"] += score
+    aggregates["dates"][date] = aggregates["dates"].get(date, 0) + 1
+
+    # Superseded heap entries are dropped lazily in weakest_area(); rebuild
+    # once they outnumber the live ones so the heap stays O(topics).
+    heapq.heappush(aggregates["weak_heap"], [weak_areas[topic], topic])
+    if len(aggregates["weak_heap"]) > 2 * len(weak_areas) + 8:
+        _rebuild_weak_heap(aggregates, weak_areas)
+
+
+def rebuild_aggregates(user: dict) -> dict:
+    """Compute aggregates from scratch for a profile that predates them."""
+    aggregates = new_aggregates()
+    for h in user.get("history", []):
+        aggregates["count"] += 1
+        aggregates["score_sum"] += h["score"]
+        topic_stats = aggregates["topics"].setdefault(h.get("topic", ""), {"count": 0, "sum": 0.0})
+        topic_stats["count"] += 1
+        topic_stats["sum"] += h["score"]
+        date = h.get("date", "")
+        aggregates["dates"][date] = aggregates["dates"].get(date, 0) + 1
+    _rebuild_weak_heap(aggregates, user.get("weak_areas", {}))
+    return aggregates
+
+
+def summarize_aggregates(aggregates: dict) -> dict:
+    """Return {"count", "average", "sessions", "topics"} from running aggregates."""
+    count = aggregates["count"]
+    return {
+        "count": count,
+        "average": aggregates["score_sum"] / count if count else 0.0,
+        "sessions": len(aggregates["dates"]),
+        "topics": {
+            topic: {"count": t["count"], "average": t["sum"] / t["count"]}
+            for topic, t in aggregates["topics"].items() if t["count"]
+        }
+    }
+
+
+def weakest_area(aggregates: dict, weak_areas: dict):
+    """Return (topic, score) with the lowest topic score, or None."""
+    heap = aggregates["weak_heap"]
+    while heap and weak_areas.get(heap[0][1]) != heap[0][0]:
+        heapq.heappop(heap)
+    if not heap:
+        return None
+    score, topic = heap[0]
+    return topic, score
+
+
+def apply_event(user: dict, event: dict) -> None:
+    """Apply one journal event to a profile dict in place."""
+    if event["type"] == "answer":
+        topic = event["topic"]
+        question_id = event["question_id"]
+        user["weak_areas"][topic] = blend_topic_score(user["weak_areas"].get(topic, 0.5), event["score"])
+        update_aggregates(user["aggregates"], topic, event["score"], event["date"], user["weak_areas"])
+        user["history"].append({
+            "question_id": question_id,
+            "score": event["score"],
+            "topic": topic,
+            "date": event["date"]
+        })
+        if question_id not in user["questions_seen"]:
+            user["questions_seen"].append(question_id)
+    elif event["type"] == "mastery":
+        user.setdefault("question_mastery", {})[event["question_id"]] = event["data"]
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """Write text to a temp file next to `path` and rename it into place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class BaseProfileStore:
+    """
+    Interface shared by the storage backends.
+
+    The default query methods scan the profile dict; backends with indexes
+    override them.
+    """
+
+    def user_ids(self) -> list:
+        raise NotImplementedError
+
+    def get_user(self, user_id: str = DEFAULT_USER) -> dict:
+        """Return a copy of the full profile dict for a user."""
+        raise NotImplementedError
+
+    @contextmanager
+    def _reading(self, user_id: str):
+        """Profile to read from in place; backends with a shared copy lock it meanwhile."""
+        yield self.get_user(user_id)
+
+    def put_user(self, user_data: dict, user_id: str = DEFAULT_USER) -> None:
+        """Replace a user's whole profile."""
+        raise NotImplementedError
+
+    def record_answer(self, question_id: str, topic: str, score: float, date: str,
+                      user_id: str = DEFAULT_USER) -> None:
+        """Append a graded answer, update the topic score and mark the question seen."""
+        raise NotImplementedError
+
+    def record_answers(self, answers: list, user_id: str = DEFAULT_USER) -> None:
+        """Record several (question_id, topic, score, date) answers in one write."""
+        for question_id, topic, score, date in answers:
+            self.record_answer(question_id, topic, score, date, user_id)
+
+    def update_mastery(self, question_id: str, updater, user_id: str = DEFAULT_USER) -> dict:
+        """
+        Replace one question's mastery data with `updater(existing_or_None)`.
+
+        Returns the new mastery data.
+        """
+        raise NotImplementedError
+
+    def load(self) -> dict:
+        """Return the whole DB as {user_id: profile}."""
+        return {user_id: self.get_user(user_id) for user_id in self.user_ids()}
+
+    def replace(self, data: dict) -> None:
+        """Replace the whole DB from a {user_id: profile} dict."""
+        for user_id, user_data in data.items():
+            self.put_user(user_data, user_id)
+
+    def selection_state(self, user_id: str = DEFAULT_USER) -> dict:
+        """Return {"weak_areas", "questions_seen"}: what question selection needs, without the history."""
+        with self._reading(user_id) as user:
+            return {"weak_areas": dict(user["weak_areas"]), "questions_seen": list(user["questions_seen"])}
+
+    def get_question_mastery(self, user_id: str = DEFAULT_USER) -> dict:
+        with self._reading(user_id) as user:
+            return copy.deepcopy(user.get("question_mastery", {}))
+
+    def history_summary(self, user_id: str = DEFAULT_USER) -> dict:
+        """Return {"count", "average", "sessions", "topics"} over a user's answer history."""
+        with self._reading(user_id) as user:
+            return summarize_aggregates(user["aggregates"])
+
+    def weakest_area(self, user_id: str = DEFAULT_USER):
+        """Return (topic, score) for the user's weakest topic, or None."""
+        with self._reading(user_id) as user:
+            return weakest_area(user["aggregates"], user["weak_areas"])
+
+    def recent_scores(self, limit: int = 10, user_id: str = DEFAULT_USER) -> list:
+        """Return the last `limit` scores, oldest first."""
+        with self._reading(user_id) as user:
+            return [h["score"] for h in user.get("history", [])[-limit:]]
+
+    def not_due_question_ids(self, today: str, user_id: str = DEFAULT_USER) -> set:
+        """Return ids of questions whose next review is after `today` (YYYY-MM-DD)."""
+        with self._reading(user_id) as user:
+            return {
+                q_id for q_id, data in user.get("question_mastery", {}).items()
+                if (data.get("next_review") or "") > today
+            }
+
+    def flush(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class ProfileStore(BaseProfileStore):
+    """
+    In-memory profile DB sharded per user, persisted as snapshot + journal.
+
+    Each user has a snapshot file (`<user>.json`) and an append-only event
+    journal (`<user>.events.jsonl`). Recording an answer or a mastery update
+    appends one JSON line to the journal and applies it to the in-memory
+    profile, so a write costs O(1) regardless of history length. Loading a
+    profile reads the snapshot and replays the journal tail.
+
+    Several processes can share one directory. Writes take an exclusive
+    per-user file lock (`<user>.lock`), first replay any events other
+    processes appended, then append; the event's sequence number is the
+    profile version. Reads catch up on the journal tail without locking.
+    Different users never contend.
+
+    A background thread runs every `flush_interval` seconds and compacts
+    users whose journal has grown past `snapshot_every` events, folding the
+    events into a fresh snapshot. An interval of 0 disables the thread,
+    leaving compaction to explicit `flush()`/`compact()` calls.
+
+    At most `max_users` profiles stay in memory; the least recently used
+    ones (with no compaction pending) are dropped and reloaded from disk
+    when next needed.
+
+    Profiles still living in the single-file layout at `legacy_path` are
+    picked up the first time their user is loaded.
+    """
+
+    def __init__(self, directory: str, legacy_path: str = None,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+                 max_users: int = DEFAULT_MAX_USERS):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.max_users = max_users
+        self._users = OrderedDict()  # Least recently used first; changed under _guard
+        self._seq = {}  # Last event sequence number applied per user
+        self._pending = {}  # Journal events not yet folded into a snapshot
+        self._offset = {}  # Bytes of the journal already replayed
+        self._snapshot_ids = {}  # (inode, mtime) of the snapshot we loaded
+        self._dirty = set()
+        self._locks = {}
+        self._guard = threading.Lock()
+        self._legacy = None
+        self._stop = threading.Event()
+        self._flusher = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _user_path(self, user_id: str) -> str:
+        return os.path.join(self.directory, quote(user_id, safe="") + ".json")
+
+    def _journal_path(self, user_id: str) -> str:
+        return os.path.join(self.directory, quote(user_id, safe="") + ".events.jsonl")
+
+    def _lock_path(self, user_id: str) -> str:
+        return os.path.join(self.directory, quote(user_id, safe="") + ".lock")
+
+    def _user_lock(self, user_id: str) -> threading.RLock:
+        with self._guard:
+            lock = self._locks.get(user_id)
+            if lock is None:
+                lock = self._locks[user_id] = threading.RLock()
+            return lock
+
+    @contextmanager
+    def _write_lock(self, user_id: str):
+        """Exclusive access to a user's files across threads and processes."""
+        with self._user_lock(user_id):
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path(user_id), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_legacy(self, user_id: str):
+        if self.legacy_path is None:
+            return None
+        with self._guard:
+            if self._legacy is None:
+                try:
+                    with open(self.legacy_path, "r") as f:
+                        self._legacy = json.load(f)
+                except (OSError, ValueError):
+                    self._legacy = {}
+            return self._legacy.get(user_id)
+
+    def _snapshot_id(self, user_id: str):
+        try:
+            st = os.stat(self._user_path(user_id))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns)
+
+    def _read_snapshot(self, user_id: str):
+        """Return (profile, seq) from the user's snapshot file."""
+        try:
+            with open(self._user_path(user_id), "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            legacy = self._read_legacy(user_id)
+            return (_upgrade_user(legacy) if legacy is not None else new_user_profile()), 0
+        except (OSError, ValueError):
+            return new_user_profile(), 0
+        if "profile" in data and "seq" in data:
+            return _upgrade_user(data["profile"]), data["seq"]
+        return _upgrade_user(data), 0  # Bare profile written before the journal existed
+
+    def _read_journal(self, user_id: str, after_seq: int, offset: int = 0):
+        """
+        Return (events with seq > after_seq, new offset) reading from `offset`.
+
+        Stops before an incomplete last line, which is either a write still in
+        progress or the remains of a crashed one.
+        """
+        events = []
+        try:
+            with open(self._journal_path(user_id), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event.get("seq", 0) > after_seq:
+                        events.append(event)
+        except FileNotFoundError:
+            pass
+        return events, offset
+
+    def _load_user(self, user_id: str) -> dict:
+        snapshot_id = self._snapshot_id(user_id)
+        user, seq = self._read_snapshot(user_id)
+        events, offset = self._read_journal(user_id, seq)
+        for event in events:
+            apply_event(user, event)
+            seq = event["seq"]
+        self._seq[user_id] = seq
+        self._pending[user_id] = len(events)
+        self._offset[user_id] = offset
+        self._snapshot_ids[user_id] = snapshot_id
+        with self._guard:
+            self._users[user_id] = user
+            self._evict(keep=user_id)
+        return user
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used profiles past max_users; the caller holds _guard."""
+        for user_id in list(self._users):
+            if len(self._users) <= self.max_users:
+                break
+            lock = self._locks.get(user_id)
+            if user_id == keep or user_id in self._dirty:
+                continue
+            # A profile another thread is working on stays until it is done
+            if lock is not None and not lock.acquire(blocking=False):
+                continue
+            try:
+                for table in (self._users, self._seq, self._pending, self._offset, self._snapshot_ids):
+                    table.pop(user_id, None)
+            finally:
+                if lock is not None:
+                    lock.release()
+
+    def _sync(self, user_id: str) -> dict:
+        """Bring the in-memory profile up to date with what other processes wrote."""
+        with self._guard:
+            user = self._users.get(user_id)
+            if user is not None:
+                self._users.move_to_end(user_id)
+        if user is None or self._snapshot_id(user_id) != self._snapshot_ids[user_id]:
+            return self._load_user(user_id)
+        events, self._offset[user_id] = self._read_journal(
+            user_id, self._seq[user_id], self._offset[user_id]
+        )
+        for event in events:
+            apply_event(user, event)
+            self._seq[user_id] = event["seq"]
+        self._pending[user_id] += len(events)
+        return user
+
+    def user_ids(self) -> list:
+        ids = {
+            unquote(name[:-len(".json")])
+            for name in os.listdir(self.directory)
+            if name.endswith(".json") and not name.startswith(".")
+        }
+        ids.update(
+            unquote(name[:-len(".events.jsonl")])
+            for name in os.listdir(self.directory)
+            if name.endswith(".events.jsonl")
+        )
+        with self._guard:
+            ids.update(self._users)
+        if self.legacy_path is not None and os.path.exists(self.legacy_path):
+            self._read_legacy(DEFAULT_USER)
+            ids.update(self._legacy)
+        return sorted(ids)
+
+    def get_user(self, user_id: str = DEFAULT_USER) -> dict:
+        """Return a copy of the up-to-date profile dict for a user."""
+        with self._reading(user_id) as user:
+            return copy.deepcopy(user)
+
+    @contextmanager
+    def _reading(self, user_id: str):
+        # Queries read the shared profile in place (weakest_area also pops
+        # stale heap entries from it), so writers wait meanwhile
+        with self._user_lock(user_id):
+            yield self._sync(user_id)
+
+    def put_user(self, user_data: dict, user_id: str = DEFAULT_USER) -> None:
+        """Replace a profile and write it straight to a new snapshot."""
+        with self._write_lock(user_id):
+            self._sync(user_id)
+            user_data = copy.deepcopy(user_data)
+            user_data.pop("aggregates", None)
+            with self._guard:
+                self._users[user_id] = _upgrade_user(user_data)
+            self._write_snapshot(user_id)
+
+    def _append_locked(self, user_id: str, events: list) -> list:
+        """Journal and apply events; the caller holds the write lock and has synced."""
+        user = self._users[user_id]
+        seq = self._seq[user_id]
+        events = [dict(event, seq=seq + i) for i, event in enumerate(events, 1)]
+        data = b"".join(
+            (json.dumps(event, separators=(",", ":")) + "\n").encode() for event in events
+        )
+        with open(self._journal_path(user_id), "ab") as f:
+            if f.tell() != self._offset[user_id]:
+                # A crashed writer left a partial line; terminate it so our
+                # events start on a line of their own.
+                data = b"\n" + data
+            f.write(data)
+            self._offset[user_id] = f.tell()
+        for event in events:
+            apply_event(user, event)
+        self._seq[user_id] = seq + len(events)
+        self._pending[user_id] += len(events)
+        if self._pending[user_id] >= self.snapshot_every:
+            self._mark_dirty(user_id)
+        return events
+
+    def append_events(self, events: list, user_id: str = DEFAULT_USER) -> list:
+        """Journal events with a single write and apply them to the in-memory profile."""
+        with self._write_lock(user_id):
+            self._sync(user_id)
+            return self._append_locked(user_id, events)
+
+    def append_event(self, event: dict, user_id: str = DEFAULT_USER) -> dict:
+        """Journal an event and apply it to the in-memory profile."""
+        return self.append_events([event], user_id)[0]
+
+    def record_answer(self, question_id: str, topic: str, score: float, date: str,
+                      user_id: str = DEFAULT_USER) -> None:
+        self.append_event({
+            "type": "answer",
+            "question_id": question_id,
+            "topic": topic,
+            "score": score,
+            "date": date
+        }, user_id)
+
+    def record_answers(self, answers: list, user_id: str = DEFAULT_USER) -> None:
+        self.append_events([
+            {"type": "answer", "question_id": q_id, "topic": topic, "score": score, "date": date}
+            for q_id, topic, score, date in answers
+        ], user_id)
+
+    def update_mastery(self, question_id: str, updater, user_id: str = DEFAULT_USER) -> dict:
+        with self._write_lock(user_id):
+            user = self._sync(user_id)
+            # The updater gets a copy: the profile changes only once the event is journalled
+            data = updater(copy.deepcopy(user.get("question_mastery", {}).get(question_id)))
+            self._append_locked(user_id, [{"type": "mastery", "question_id": question_id, "data": data}])
+            return data
+
+    def _mark_dirty(self, user_id: str) -> None:
+        with self._guard:
+            self._dirty.add(user_id)
+            if self._flusher is None and self.flush_interval > 0:
+                self._flusher = threading.Thread(
+                    target=self._run, name="mockmentor-flush", daemon=True
+                )
+                self._flusher.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _write_snapshot(self, user_id: str) -> None:
+        """Snapshot the profile and truncate its journal; the caller holds the write lock."""
+        payload = json.dumps(
+            {"seq": self._seq[user_id], "profile": self._users[user_id]}, separators=(",", ":")
+        )
+        atomic_write_text(self._user_path(user_id), payload)
+        # Every journalled event is now covered by the snapshot's seq, so the
+        # journal can start over; replay skips events <= seq anyway.
+        open(self._journal_path(user_id), "w").close()
+        self._snapshot_ids[user_id] = self._snapshot_id(user_id)
+        self._offset[user_id] = 0
+        self._pending[user_id] = 0
+        with self._guard:
+            self._dirty.discard(user_id)
+
+    def compact_user(self, user_id: str) -> bool:
+        """
+        Fold a user's journal into a new snapshot.
+
+        Returns True if a snapshot was written.
+        """
+        with self._write_lock(user_id):
+            self._sync(user_id)
+            if not self._pending[user_id]:
+                with self._guard:
+                    self._dirty.discard(user_id)
+                return False
+            self._write_snapshot(user_id)
+            return True
+
+    def flush(self) -> bool:
+        """Compact every user whose journal passed the threshold."""
+        with self._guard:
+            dirty = list(self._dirty)
+        written = False
+        for user_id in dirty:
+            written = self.compact_user(user_id) or written
+        return written
+
+    def compact(self) -> int:
+        """Compact every user in the store. Returns the number of snapshots written."""
+        return sum(1 for user_id in self.user_ids() if self.compact_user(user_id))
+
+    def close(self) -> None:
+        """Stop the background flusher and run any pending compactions."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval + 1)
+            self._flusher = None
+        self.flush()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str, backend: str = "json", legacy_path: str = None) -> BaseProfileStore:
+    """
+    Return the process-wide store for a DB path, creating it on first use.
+
+    Backends: "json" (a directory of per-user snapshots and journals) or
+    "sqlite" (a database file).
+    """
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            if backend == "sqlite":
+                from .sqlite_store import SQLiteProfileStore
+                store = SQLiteProfileStore(path)
+            else:
+                store = ProfileStore(path, legacy_path=legacy_path)
+            _stores[path] = store
+            atexit.register(store.close)
+        return store
+
+
+if __name__ == "__main__":
+    # Usage: python -m mockmentor.store compact [mockmentor_db]
+    if len(sys.argv) < 2 or sys.argv[1] != "compact":
+        sys.exit("Usage: python -m mockmentor.store compact [directory]")
+    directory = sys.argv[2] if len(sys.argv) > 2 else "mockmentor_db"
+    store = ProfileStore(directory, flush_interval=0)
+    print(f"Compacted {store.compact()} user(s) in {directory}")
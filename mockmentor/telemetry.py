@@ -0,0 +1,195 @@
+"""
+LLM Telemetry
+Per-call latency, token and outcome probes for every LLM call site
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+TELEMETRY_PATH = os.environ.get("MOCKMENTOR_TELEMETRY_PATH", "mockmentor_llm_calls.jsonl")
+TELEMETRY_ENABLED = os.environ.get("MOCKMENTOR_TELEMETRY", "1").lower() not in ("0", "false", "off")
+# Size at which the log moves to <path>.1 (replacing the previous one) and starts over; 0 never rotates
+TELEMETRY_MAX_BYTES = int(float(os.environ.get("MOCKMENTOR_TELEMETRY_MAX_MB", "16")) * 1024 * 1024)
+RECENT_LIMIT = 2000
+
+_current = contextvars.ContextVar("mockmentor_llm_probe", default=None)
+_recent = deque(maxlen=RECENT_LIMIT)
+_write_lock = threading.Lock()
+
+
+class Probe:
+    """Measurements for one logical LLM call, filled in by the model layers."""
+
+    def __init__(self, site: str):
+        self.site = site
+        self.started = time.monotonic()
+        self.ttft = None
+        self.provider = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached = False
+        self.outcome = "parsed"
+        self.error = None
+
+    def first_token(self) -> None:
+        if self.ttft is None:
+            self.ttft = time.monotonic() - self.started
+
+    def usage(self, provider: str, prompt_tokens: int, completion_tokens: int, cached: bool = False) -> None:
+        self.first_token()
+        self.provider = provider
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cached = cached
+
+    def fell_back(self, error: Exception = None) -> None:
+        """The call site discarded the response and used its fallback."""
+        self.outcome = "fallback"
+        if error is not None:
+            self.error = str(error)[:200]
+
+
+def current():
+    """The probe of the call site currently running, if any."""
+    return _current.get()
+
+
+def report_usage(provider: str, prompt: str, completion: str, cached: bool = False,
+                 prompt_tokens: int = None, completion_tokens: int = None) -> None:
+    """Attach usage to the current probe, estimating tokens the provider didn't report."""
+    probe_ = _current.get()
+    if probe_ is None:
+        return
+    from .prompt_budget import count_tokens
+    probe_.usage(
+        provider,
+        prompt_tokens if prompt_tokens is not None else count_tokens(prompt, provider),
+        completion_tokens if completion_tokens is not None else count_tokens(completion, provider),
+        cached
+    )
+
+
+def _record(record: dict) -> None:
+    _recent.append(record)
+    if not TELEMETRY_ENABLED:
+        return
+    line = json.dumps(record) + "\n"
+    with _write_lock:
+        try:
+            with open(TELEMETRY_PATH, "a", encoding="utf-8") as f:
+                f.write(line)
+                full = TELEMETRY_MAX_BYTES and f.tell() >= TELEMETRY_MAX_BYTES
+            if full:
+                os.replace(TELEMETRY_PATH, TELEMETRY_PATH + ".1")
+        except OSError:
+            pass
+
+
+@contextmanager
+def probe(site: str):
+    """
+    Time one LLM call site.
+
+    Usage:
+        with probe("grading") as call:
+            try:
+                ...
+            except Exception as e:
+                call.fell_back(e)
+    """
+    probe_ = Probe(site)
+    token = _current.set(probe_)
+    try:
+        yield probe_
+    except BaseException as e:
+        probe_.outcome = "error"
+        probe_.error = str(e)[:200]
+        raise
+    finally:
+        _current.reset(token)
+        _record({
+            "ts": time.time(),
+            "site": probe_.site,
+            "wall_seconds": round(time.monotonic() - probe_.started, 4),
+            "ttft_seconds": round(probe_.ttft, 4) if probe_.ttft is not None else None,
+            "provider": probe_.provider,
+            "prompt_tokens": probe_.prompt_tokens,
+            "completion_tokens": probe_.completion_tokens,
+            "cached": probe_.cached,
+            "outcome": probe_.outcome,
+            "error": probe_.error
+        })
+
+
+def _percentile(values: list, pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(records) -> dict:
+    """p50/p95/p99 wall time and TTFT, tokens and rates per call site."""
+    sites = {}
+    for record in records:
+        sites.setdefault(record["site"], []).append(record)
+    summary = {}
+    for site, rows in sorted(sites.items()):
+        wall = [r["wall_seconds"] for r in rows]
+        ttft = [r["ttft_seconds"] for r in rows if r.get("ttft_seconds") is not None]
+        summary[site] = {
+            "calls": len(rows),
+            "wall_p50": _percentile(wall, 50),
+            "wall_p95": _percentile(wall, 95),
+            "wall_p99": _percentile(wall, 99),
+            "ttft_p50": _percentile(ttft, 50),
+            "ttft_p95": _percentile(ttft, 95),
+            "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in rows),
+            "completion_tokens": sum(r.get("completion_tokens") or 0 for r in rows),
+            "cache_hit_rate": sum(1 for r in rows if r.get("cached")) / len(rows),
+            "fallback_rate": sum(1 for r in rows if r.get("outcome") != "parsed") / len(rows)
+        }
+    return summary
+
+
+def get_call_stats() -> dict:
+    """Summary of the calls made by this process (most recent RECENT_LIMIT)."""
+    return summarize(list(_recent))
+
+
+def load_records(path: str = TELEMETRY_PATH) -> list:
+    """Records of the log at `path`, preceded by those of its rotated predecessor (if any)."""
+    records = []
+    for name in (path + ".1", path):
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else TELEMETRY_PATH
+    summary = summarize(load_records(path))
+    print(f"{'site':<16}{'calls':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'ttft50':>8}{'ttft95':>8}"
+          f"{'tok in':>10}{'tok out':>10}{'cache':>7}{'fallbk':>7}")
+    for site, row in summary.items():
+        print(f"{site:<16}{row['calls']:>7}{_fmt(row['wall_p50']):>8}{_fmt(row['wall_p95']):>8}"
+              f"{_fmt(row['wall_p99']):>8}{_fmt(row['ttft_p50']):>8}{_fmt(row['ttft_p95']):>8}"
+              f"{row['prompt_tokens']:>10}{row['completion_tokens']:>10}"
+              f"{row['cache_hit_rate']:>7.0%}{row['fallback_rate']:>7.0%}")
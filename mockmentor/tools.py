@@ -1,75 +1,66 @@
+import asyncio
 import random
-import json
 import os
 from datetime import datetime
+from functools import lru_cache
 
 
 def get_eval_model():
-    """Returns the appropriate model for evaluation based on environment config."""
-    provider = os.environ.get("MODEL_PROVIDER", "groq").lower()
-    
-    if provider == "gemini":
-        from google.adk.models import Gemini
-        model_name = os.environ.get("MODEL_NAME", "gemini-2.5-flash")
-        return Gemini(model=model_name)
-    else:
-        from google.adk.models import LiteLlm
-        model_name = os.environ.get("MODEL_NAME", "moonshotai/kimi-k2-instruct")
-        if not model_name.startswith("groq/"):
-            model_name = f"groq/{model_name}"
-        return LiteLlm(model=model_name)
+    """
+    Returns the shared evaluation model for the configured provider(s),
+    hedged across providers when more than one is configured, with
+    identical concurrent requests coalesced (unless MOCKMENTOR_SINGLEFLIGHT=0)
+    and behind the completion cache unless MOCKMENTOR_LLM_CACHE=0.
+    """
+    model = get_routed_model()
+    cache = get_completion_cache()
+    if SINGLEFLIGHT_ENABLED:
+        model = SingleFlightModel(model, get_singleflight(), cache)
+    if cache is None:
+        return model
+    return CachedModel(model, cache, model.provider, model.model_name)
+from .json_extract import extract_json
+from .llm_cache import CachedModel, discard_completion, get_completion_cache
+from .models import iter_sync, run_sync
+from .pregrader import PREGRADE_ENABLED, pregrade
+from .prompt_budget import fit
 from .questions import QUESTIONS
+from .ratelimit import INTERACTIVE, priority
+from .routing import get_routed_model
 from .rubrics import RUBRICS
+from .semantic_cache import get_semantic_cache, grader_version, question_terms
+from .singleflight import SINGLEFLIGHT_ENABLED, SingleFlightModel, get_singleflight
+from .store import DEFAULT_USER, get_store
+from .telemetry import probe
+
+DB_FILE = "mockmentor_db.json"  # Legacy single-file layout, read for migration
+DB_DIR = "mockmentor_db"  # One JSON file per user
+SQLITE_FILE = "mockmentor.db"
 
-DB_FILE = "mockmentor_db.json"
+def _store():
+    """Profile store selected by MOCKMENTOR_STORE ("json" or "sqlite")."""
+    if os.environ.get("MOCKMENTOR_STORE", "json").lower() == "sqlite":
+        return get_store(SQLITE_FILE, backend="sqlite")
+    return get_store(DB_DIR, legacy_path=DB_FILE)
 
 def _load_db():
-    if not os.path.exists(DB_FILE):
-        return {
-            "default_user": {
-                "weak_areas": {},
-                "history": [],
-                "questions_seen": [],
-                "question_mastery": {},  # Per-question spaced repetition data
-                "session_stats": {
-                    "total_time_seconds": 0,
-                    "sessions_count": 0
-                }
-            }
-        }
-    try:
-        with open(DB_FILE, "r") as f:
-            data = json.load(f)
-            # Ensure new fields exist for backward compatibility
-            user = data.get("default_user", {})
-            if "question_mastery" not in user:
-                user["question_mastery"] = {}
-            if "session_stats" not in user:
-                user["session_stats"] = {"total_time_seconds": 0, "sessions_count": 0}
-            data["default_user"] = user
-            return data
-    except:
-         return {"default_user": {"weak_areas": {}, "history": [], "questions_seen": [], "question_mastery": {}, "session_stats": {"total_time_seconds": 0, "sessions_count": 0}}}
+    return _store().load()
 
 def _save_db(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    _store().replace(data)
 
-def _get_user_data():
-    db = _load_db()
-    return db["default_user"]
+def _get_user_data(user_id: str = DEFAULT_USER):
+    return _store().get_user(user_id or DEFAULT_USER)
 
-def _save_user_data(user_data):
-    db = _load_db()
-    db["default_user"] = user_data
-    _save_db(db)
+def _save_user_data(user_data, user_id: str = DEFAULT_USER):
+    _store().put_user(user_data, user_id or DEFAULT_USER)
 
-def select_question(topic: str = None, difficulty: str = None) -> dict:
+def select_question(topic: str = None, difficulty: str = None, user_id: str = DEFAULT_USER) -> dict:
     """
     Selects an appropriate interview question based on user's weak areas and history.
     Topic options: sql, pipelines, modeling, system_design, debugging
     """
-    user = _get_user_data()
+    user = _store().selection_state(user_id or DEFAULT_USER)
     seen = set(user["questions_seen"])
     
     # Normalize topic name for matching
@@ -141,15 +132,86 @@ def select_question(topic: str = None, difficulty: str = None) -> dict:
         
     return selected_q
 
-def evaluate_response(question_id: str, user_response: str) -> dict:
+def _rubric_text() -> str:
+    """Rubric lines for grading prompts."""
+    rubric = RUBRICS["default"]
+    return "\n    ".join(
+        f"- {name.capitalize()} (Weight {rubric[name]['weight']}): {rubric[name]['description']}"
+        for name in ("accuracy", "completeness", "clarity")
+    )
+
+def _grade_version(question: dict, eval_model) -> str:
+    """Semantic cache version: a grade is only reused for the same question, rubric and model."""
+    return grader_version(question["text"], question["ideal_points"], _rubric_text(),
+                          eval_model.provider, eval_model.model_name)
+
+@lru_cache(maxsize=256)
+def _grade_terms(question_id: str) -> frozenset:
+    """Semantic cache signature vocabulary of a bank question."""
+    return question_terms(*QUESTIONS[question_id]["ideal_points"])
+
+async def _reuse_grade(question_id: str, version: str, user_response: str, call) -> dict:
+    """Grade of a near-duplicate answer from the semantic cache, or None."""
+    cache = get_semantic_cache()
+    if cache is None:
+        return None
+    hit = await asyncio.to_thread(cache.lookup, question_id, version, user_response, _grade_terms(question_id))
+    if hit is None:
+        return None
+    result, similarity = hit
+    call.usage("semantic_cache", 0, 0, cached=True)
+    result["semantic_match"] = round(similarity, 3)
+    return result
+
+def _grading_question(question_id: str, question: dict = None) -> dict:
     """
-    Evaluates the user's response against the ideal answer and rubric.
+    The bank question for `question_id`, else an ad-hoc question (e.g. from
+    an interview plan) graded from its own ideal_points; None if neither.
+    """
+    if question_id in QUESTIONS:
+        return QUESTIONS[question_id]
+    if question and question.get("text") and question.get("ideal_points"):
+        return {"topic": "General", **question, "id": None}
+    return None
+
+async def _local_grade(question_id: str, question: dict, version: str, user_response: str, call) -> dict:
+    """
+    Grade without the model when possible: a semantic cache hit (bank
+    questions only), or a decisive rule-based pre-grade (very short or
+    off-topic answers).
+    """
+    result = None
+    if question_id in QUESTIONS:
+        result = await _reuse_grade(question_id, version, user_response, call)
+    if result is not None or not PREGRADE_ENABLED:
+        return result
+    provisional = pregrade(question, user_response)
+    if not provisional["decisive"]:
+        return None
+    call.usage("pregrader", 0, 0)
+    return provisional["result"]
+
+GRADE_KEYS = ("accuracy_score", "completeness_score", "clarity_score", "overall_score", "feedback", "key_gap")
+
+def _check_grade(result: dict) -> None:
+    """Raise ValueError unless a model grade has every field; partial grades are never kept."""
+    missing = [key for key in GRADE_KEYS if key not in result]
+    if missing:
+        raise ValueError(f"Grade is missing {', '.join(missing)}")
+
+async def _remember_grade(question_id: str, version: str, user_response: str, result: dict) -> None:
+    cache = get_semantic_cache()
+    if cache is not None and question_id in QUESTIONS:
+        await asyncio.to_thread(cache.add, question_id, version, user_response, result, _grade_terms(question_id))
+
+async def aevaluate_response(question_id: str, user_response: str, user_id: str = DEFAULT_USER,
+                             question: dict = None) -> dict:
     """
-    if question_id not in QUESTIONS:
+    Async variant of evaluate_response; awaits the model instead of blocking.
+    """
+    question = _grading_question(question_id, question)
+    if question is None:
         return {"error": "Invalid Question ID"}
-        
-    question = QUESTIONS[question_id]
-    rubric = RUBRICS["default"]
     
     eval_model = get_eval_model()
     
@@ -159,12 +221,10 @@ def evaluate_response(question_id: str, user_response: str) -> dict:
     Question: {question['text']}
     Ideal Answer Points: {', '.join(question['ideal_points'])}
     
-    User Answer: {user_response}
+    User Answer: {fit(user_response, 'answer')}
     
     Rubric:
-    - Accuracy (Weight {rubric['accuracy']['weight']}): {rubric['accuracy']['description']}
-    - Completeness (Weight {rubric['completeness']['weight']}): {rubric['completeness']['description']}
-    - Clarity (Weight {rubric['clarity']['weight']}): {rubric['clarity']['description']}
+    {_rubric_text()}
     
     Return JSON only:
     {{
@@ -177,67 +237,294 @@ def evaluate_response(question_id: str, user_response: str) -> dict:
     }}
     """
     
-    try:
-        response = eval_model.generate(prompt)
-        text = response.text.replace("```json", "").replace("```", "").strip()
-        result = json.loads(text)
-    except Exception as e:
-        result = {
-            "accuracy_score": 5,
-            "overall_score": 5,
-            "feedback": f"Grading error: {str(e)}. Good effort though.",
-            "key_gap": "Unknown"
-        }
+    version = _grade_version(question, eval_model)
+    with probe("grading") as call:
+        result = await _local_grade(question_id, question, version, user_response, call)
+        if result is None:
+            try:
+                with priority(INTERACTIVE):
+                    response = await eval_model.agenerate(prompt)
+                result = extract_json(response.text, dict)
+                _check_grade(result)
+                await _remember_grade(question_id, version, user_response, result)
+            except Exception as e:
+                call.fell_back(e)
+                await discard_completion(eval_model, prompt)
+                result = {
+                    "accuracy_score": 5,
+                    "overall_score": 5,
+                    "feedback": f"Grading error: {str(e)}. Good effort though.",
+                    "key_gap": "Unknown"
+                }
 
-    # Atomic-ish update
-    user = _get_user_data()
-    topic = question["topic"]
-    
-    current_topic_score = user["weak_areas"].get(topic, 0.5)
-    new_score = (current_topic_score * 0.7) + ((result["overall_score"] / 10.0) * 0.3)
-    user["weak_areas"][topic] = new_score
-    
-    user["history"].append({
-        "question_id": question_id,
-        "score": result["overall_score"],
-        "topic": topic,
-        "date": datetime.now().isoformat()[:10]
-    })
-    if question_id not in user["questions_seen"]:
-        user["questions_seen"].append(question_id)
-        
-    _save_user_data(user)
+    if question_id in QUESTIONS:
+        await asyncio.to_thread(
+            _store().record_answer,
+            question_id,
+            question["topic"],
+            result["overall_score"],
+            datetime.now().isoformat()[:10],
+            user_id=user_id or DEFAULT_USER
+        )
     
     return result
 
-def get_profile() -> dict:
-    return _get_user_data()
+def evaluate_response(question_id: str, user_response: str, user_id: str = DEFAULT_USER,
+                      question: dict = None) -> dict:
+    """
+    Evaluates the user's response against the ideal answer and rubric.
+    
+    Questions outside the bank (interview plan questions) are graded from
+    the `question` dict's own text and ideal_points; their scores are not
+    recorded in the learning profile.
+    
+    A near-duplicate of an answer already graded for the same question
+    reuses that grade (see semantic_cache); the result then carries
+    "semantic_match" with the similarity. Very short and off-topic answers
+    are graded by ideal-point coverage alone (see pregrader); the result
+    then carries "pregraded" with the reason.
+    """
+    return run_sync(aevaluate_response(question_id, user_response, user_id, question))
+
+SCORES_MARKER = "SCORES:"
 
-def create_usage_report() -> str:
-    user = _get_user_data()
-    hist = user["history"]
-    if not hist:
+async def astream_evaluate_response(question_id: str, user_response: str, user_id: str = DEFAULT_USER,
+                                    question: dict = None):
+    """
+    Async variant of stream_evaluate_response.
+    """
+    question = _grading_question(question_id, question)
+    if question is None:
+        yield {"error": "Invalid Question ID"}
+        return
+    
+    eval_model = get_eval_model()
+    version = _grade_version(question, eval_model)
+    
+    prompt = f"""
+    You are an expert interviewer. Grade this answer.
+    
+    Question: {question['text']}
+    Ideal Answer Points: {', '.join(question['ideal_points'])}
+    
+    User Answer: {fit(user_response, 'answer')}
+    
+    Rubric:
+    {_rubric_text()}
+    
+    First write your feedback to the candidate as plain prose (2-4 sentences, no headings).
+    Then, on a new line, write {SCORES_MARKER} followed by JSON only:
+    {{
+        "accuracy_score": (0-10),
+        "completeness_score": (0-10),
+        "clarity_score": (0-10),
+        "overall_score": (0-10),
+        "key_gap": "string"
+    }}
+    """
+    
+    # Hold back enough text that a marker split across chunks is never shown
+    holdback = len(SCORES_MARKER) - 1
+    buffer = ""
+    shown = 0
+    marker_at = -1
+    with probe("grading_stream") as call:
+        result = await _local_grade(question_id, question, version, user_response, call)
+        if result is not None:
+            yield result.get("feedback", "")
+        else:
+            try:
+                with priority(INTERACTIVE):
+                    async for chunk in eval_model.astream(prompt):
+                        buffer += chunk
+                        if marker_at < 0:
+                            marker_at = buffer.find(SCORES_MARKER)
+                            visible = marker_at if marker_at >= 0 else max(len(buffer) - holdback, shown)
+                            if visible > shown:
+                                yield buffer[shown:visible]
+                                shown = visible
+                if marker_at < 0:
+                    raise ValueError("no scores in grading response")
+                result = extract_json(buffer[marker_at + len(SCORES_MARKER):], dict)
+                result["feedback"] = buffer[:marker_at].strip()
+                _check_grade(result)
+                await _remember_grade(question_id, version, user_response, result)
+            except Exception as e:
+                call.fell_back(e)
+                await discard_completion(eval_model, prompt)
+                # Keep whatever feedback the model managed to write
+                feedback = (buffer[:marker_at] if marker_at >= 0 else buffer).strip()
+                if marker_at < 0 and feedback and len(buffer) > shown:
+                    yield buffer[shown:]
+                if not feedback:
+                    feedback = f"Grading error: {str(e)}. Good effort though."
+                    yield feedback
+                result = {
+                    "accuracy_score": 5,
+                    "overall_score": 5,
+                    "feedback": feedback,
+                    "key_gap": "Unknown"
+                }
+    
+    if question_id in QUESTIONS:
+        await asyncio.to_thread(
+            _store().record_answer,
+            question_id,
+            question["topic"],
+            result["overall_score"],
+            datetime.now().isoformat()[:10],
+            user_id=user_id or DEFAULT_USER
+        )
+    
+    yield result
+
+def stream_evaluate_response(question_id: str, user_response: str, user_id: str = DEFAULT_USER,
+                             question: dict = None):
+    """
+    Streaming form of evaluate_response for progressive rendering.
+    
+    The model writes its feedback before the scores, so the candidate sees
+    feedback text while grading is still running.
+    
+    Yields:
+        Feedback text chunks (str) as they arrive, then the final result
+        dict (same shape as evaluate_response) as the last item
+    """
+    return iter_sync(astream_evaluate_response(question_id, user_response, user_id, question))
+
+async def aevaluate_responses_batch(items: list, user_id: str = DEFAULT_USER) -> list:
+    """
+    Async variant of evaluate_responses_batch.
+    """
+    results = [None] * len(items)
+    eval_model = get_eval_model()
+    versions = {}
+    graded = {}
+    error = None
+    with probe("grading_batch") as call:
+        blocks = []
+        block_items = []
+        for i, (question_id, user_response) in enumerate(items):
+            if question_id not in QUESTIONS:
+                results[i] = {"error": "Invalid Question ID"}
+                continue
+            question = QUESTIONS[question_id]
+            versions[i] = _grade_version(question, eval_model)
+            results[i] = await _local_grade(question_id, question, versions[i], user_response, call)
+            if results[i] is not None:
+                continue
+            block_items.append(i)
+            blocks.append(f"""
+    Answer {len(blocks) + 1}
+    Question: {question['text']}
+    Ideal Answer Points: {', '.join(question['ideal_points'])}
+    User Answer: {fit(user_response, 'answer')}
+    """)
+        
+        if blocks:
+            prompt = f"""
+    You are an expert interviewer. Grade each answer below independently.
+    
+    Rubric:
+    {_rubric_text()}
+    {"".join(blocks)}
+    Return a JSON array only, one object per answer, using the answer number as "index":
+    [
+        {{
+            "index": 1,
+            "accuracy_score": (0-10),
+            "completeness_score": (0-10),
+            "clarity_score": (0-10),
+            "overall_score": (0-10),
+            "feedback": "string",
+            "key_gap": "string"
+        }}
+    ]
+    """
+            try:
+                with priority(INTERACTIVE):
+                    response = await eval_model.agenerate(prompt)
+                # Answers cut off by truncation fall back individually below
+                for item in extract_json(response.text, list):
+                    if not isinstance(item, dict):
+                        continue
+                    index = item.pop("index", None)
+                    if isinstance(index, int) and 0 < index <= len(block_items) and all(key in item for key in GRADE_KEYS):
+                        graded[block_items[index - 1]] = item
+            except Exception as e:
+                error = e
+            
+            # Recorded once, whether the call failed or only some answers came back
+            if error is not None or len(graded) < len(blocks):
+                call.fell_back(error)
+                # A partial or unparseable batch must not be served to retries
+                await discard_completion(eval_model, prompt)
+    
+    today = datetime.now().isoformat()[:10]
+    answers = []
+    for i, (question_id, user_response) in enumerate(items):
+        if question_id not in QUESTIONS:
+            continue
+        if i in graded:
+            results[i] = graded[i]
+            await _remember_grade(question_id, versions[i], user_response, results[i])
+        elif results[i] is None:
+            results[i] = {
+                "accuracy_score": 5,
+                "overall_score": 5,
+                "feedback": f"Grading error: {str(error or 'missing from batch response')}. Good effort though.",
+                "key_gap": "Unknown"
+            }
+        answers.append((question_id, QUESTIONS[question_id]["topic"], results[i]["overall_score"], today))
+    
+    if answers:
+        await asyncio.to_thread(_store().record_answers, answers, user_id=user_id or DEFAULT_USER)
+    
+    return results
+
+def evaluate_responses_batch(items: list, user_id: str = DEFAULT_USER) -> list:
+    """
+    Grades several answers with a single model call and records them in one store write.
+    
+    Args:
+        items: [(question_id, user_response), ...]
+        user_id: Whose profile to update
+    
+    Returns:
+        One result dict per item, in input order (same shape as evaluate_response)
+    """
+    return run_sync(aevaluate_responses_batch(items, user_id))
+
+def get_profile(user_id: str = DEFAULT_USER) -> dict:
+    return _get_user_data(user_id)
+
+def create_usage_report(user_id: str = DEFAULT_USER) -> str:
+    user_id = user_id or DEFAULT_USER
+    store = _store()
+    summary = store.history_summary(user_id)
+    if not summary["count"]:
         return "No sessions recorded yet."
         
-    avg_score = sum(h["score"] for h in hist) / len(hist)
+    avg_score = summary["average"]
     
-    if user["weak_areas"]:
-        weakest_link = min(user["weak_areas"].items(), key=lambda x: x[1])
+    weakest_link = store.weakest_area(user_id)
+    if weakest_link:
         weakest_str = f"{weakest_link[0]} ({weakest_link[1]:.2f})"
     else:
         weakest_str = "None identified"
     
     return f"""
-    Sessions: {len(hist)}
+    Sessions: {summary["count"]}
     Average Score: {avg_score:.1f}/10
     Weakest Area: {weakest_str}
-    Questions Answered: {len(hist)}
+    Questions Answered: {summary["count"]}
     """
 
 
 # --- Learning Engine Integration ---
 
-def update_mastery(question_id: str, score: float, confidence: int = 2) -> dict:
+def update_mastery(question_id: str, score: float, confidence: int = 2,
+                   user_id: str = DEFAULT_USER) -> dict:
     """
     Update mastery data for a question after practice.
     
@@ -245,25 +532,23 @@ def update_mastery(question_id: str, score: float, confidence: int = 2) -> dict:
         question_id: The question ID
         score: Score 0-10 from evaluation
         confidence: Self-assessed confidence 1-3 (1=need practice, 2=partial, 3=confident)
+        user_id: Whose profile to update
     
     Returns:
         Updated question mastery data
     """
     from .learning_engine import update_question_mastery
     
-    user = _get_user_data()
-    question_mastery = user.get("question_mastery", {})
-    
-    updated_data = update_question_mastery(question_id, score, confidence, question_mastery)
-    question_mastery[question_id] = updated_data
-    
-    user["question_mastery"] = question_mastery
-    _save_user_data(user)
-    
-    return updated_data
+    return _store().update_mastery(
+        question_id,
+        lambda existing: update_question_mastery(
+            question_id, score, confidence, {question_id: existing} if existing else {}
+        ),
+        user_id=user_id or DEFAULT_USER
+    )
 
 
-def get_analytics() -> dict:
+def get_analytics(user_id: str = DEFAULT_USER) -> dict:
     """
     Get comprehensive analytics for the Stats tab.
     
@@ -272,6 +557,7 @@ def get_analytics() -> dict:
             "total_questions_answered": int,
             "total_sessions": int,
             "topic_mastery": {topic: {stats}},
+            "topic_scores": {topic: {"count": int, "average": float}},
             "weak_topics": [(topic, percentage)],
             "due_for_review": int,
             "recent_scores": [last 10 scores],
@@ -284,9 +570,10 @@ def get_analytics() -> dict:
         get_practice_recommendations
     )
     
-    user = _get_user_data()
-    history = user.get("history", [])
-    question_mastery = user.get("question_mastery", {})
+    user_id = user_id or DEFAULT_USER
+    store = _store()
+    summary = store.history_summary(user_id)
+    question_mastery = store.get_question_mastery(user_id)
     
     questions_list = list(QUESTIONS.values())
     
@@ -301,12 +588,13 @@ def get_analytics() -> dict:
     recommendations = get_practice_recommendations(questions_list, question_mastery)
     
     # Recent scores
-    recent_scores = [h["score"] for h in history[-10:]]
+    recent_scores = store.recent_scores(10, user_id)
     
     return {
-        "total_questions_answered": len(history),
-        "total_sessions": len(set(h.get("date", "") for h in history)),
+        "total_questions_answered": summary["count"],
+        "total_sessions": summary["sessions"],
         "topic_mastery": topic_mastery,
+        "topic_scores": summary["topics"],
         "weak_topics": weak_topics,
         "due_for_review": recommendations["due_count"],
         "recent_scores": recent_scores,
@@ -314,7 +602,8 @@ def get_analytics() -> dict:
     }
 
 
-def select_smart_question(mode: str = "balanced", topic: str = None) -> dict:
+def select_smart_question(mode: str = "balanced", topic: str = None,
+                          user_id: str = DEFAULT_USER) -> dict:
     """
     Select a question using learning engine algorithms.
     
@@ -327,18 +616,19 @@ def select_smart_question(mode: str = "balanced", topic: str = None) -> dict:
     Args:
         mode: Selection strategy
         topic: Optional topic filter
+        user_id: Whose mastery data to use
     
     Returns:
         Selected question dict
     """
     from .learning_engine import (
         select_interleaved_questions,
-        is_due_for_review,
         get_weak_topics
     )
     
-    user = _get_user_data()
-    question_mastery = user.get("question_mastery", {})
+    user_id = user_id or DEFAULT_USER
+    store = _store()
+    question_mastery = store.get_question_mastery(user_id)
     questions_list = list(QUESTIONS.values())
     
     # Filter by topic if specified
@@ -356,10 +646,8 @@ def select_smart_question(mode: str = "balanced", topic: str = None) -> dict:
     
     if mode == "review":
         # Prioritize due questions
-        due_questions = [
-            q for q in questions_list 
-            if is_due_for_review(question_mastery.get(q["id"], {}))
-        ]
+        not_due = store.not_due_question_ids(datetime.now().isoformat()[:10], user_id)
+        due_questions = [q for q in questions_list if q["id"] not in not_due]
         if due_questions:
             questions_list = due_questions
     
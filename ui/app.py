@@ -219,6 +219,9 @@ if "match_result" not in st.session_state:
 if "interview_plan" not in st.session_state:
     st.session_state.interview_plan = None
 
+from mockmentor.interview_session import get_user_id
+get_user_id()
+
 
 def navigate_to(page: str):
     """Navigate to a different page."""
@@ -492,6 +495,9 @@ elif page == "interview":
                 previous_answer=prev_answer
             )
             
+            # Pre-generate likely follow-ups while the candidate answers
+            session.speculate_follow_ups()
+            
             # Display as interviewer speech
             st.markdown(f'''
                 <div style="background: #18181b; border: 1px solid #27272a; border-radius: 12px; padding: 1.5rem; margin-bottom: 1rem;">
@@ -553,25 +559,45 @@ elif page == "interview":
             with col1:
                 if st.button("Submit Answer", type="primary", use_container_width=True):
                     if answer:
-                        with st.spinner("Evaluating..."):
-                            from mockmentor.tools import evaluate_response
-                            
-                            # Evaluate answer
-                            result = evaluate_response(question.get("id", "custom"), answer)
-                            score = result.get("overall_score", 5)
-                            feedback = result.get("feedback", "Good effort!")
-                            
-                            # Record answer
-                            voice_metrics = st.session_state.get("current_voice_metrics")
-                            session.record_answer(answer, score, feedback, voice_metrics)
-                            
-                            # Show feedback
-                            st.markdown(f"**Score:** {score}/10")
-                            st.markdown(f"**Feedback:** {feedback}")
-                            
-                            # Clear for next
-                            st.session_state.current_answer = ""
-                            st.session_state.current_voice_metrics = None
+                        from mockmentor.tools import stream_evaluate_response
+                        
+                        # Evaluate answer (plan questions by their own ideal points), streaming feedback
+                        result = {}
+                        streamed = []
+                        
+                        def feedback_stream():
+                            for chunk in stream_evaluate_response(
+                                question.get("id", "custom"), answer,
+                                user_id=st.session_state.user_id, question=question
+                            ):
+                                if isinstance(chunk, dict):
+                                    result.update(chunk)
+                                else:
+                                    streamed.append(chunk)
+                                    yield chunk
+                        
+                        st.markdown("**Feedback:**")
+                        st.write_stream(feedback_stream())
+                        score = result.get("overall_score", 5)
+                        feedback = result.get("feedback", "Good effort!")
+                        if not "".join(streamed).strip():
+                            st.markdown(feedback)
+                        
+                        # Record answer
+                        voice_metrics = st.session_state.get("current_voice_metrics")
+                        session.record_answer(answer, score, feedback, voice_metrics)
+                        
+                        # Show score
+                        st.markdown(f"**Score:** {score}/10")
+                        
+                        # Queue a follow-up as the next question when the answer left a gap
+                        follow_up = session.next_follow_up(answer, score)
+                        if follow_up:
+                            st.markdown(f"**Up next (follow-up):** {follow_up['text']}")
+                        
+                        # Clear for next
+                        st.session_state.current_answer = ""
+                        st.session_state.current_voice_metrics = None
                     else:
                         st.warning("Please provide an answer.")
             
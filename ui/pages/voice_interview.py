@@ -208,6 +208,9 @@ else:
                 previous_answer=prev_answer
             )
             
+            # Pre-generate likely follow-ups while the candidate answers
+            session.speculate_follow_ups()
+            
             # Display interviewer speech
             st.markdown(f'''
             <div class="speech-bubble">
@@ -256,20 +259,39 @@ else:
                     ''', unsafe_allow_html=True)
                     
                     # Evaluate and respond
-                    from mockmentor.tools import evaluate_response
+                    from mockmentor.tools import stream_evaluate_response
+                    from mockmentor.interview_session import get_user_id
                     from mockmentor.persona import format_feedback_conversationally
                     
-                    with st.spinner(""):
-                        result = evaluate_response(question.get("id", "custom"), transcription)
-                        score = result.get("overall_score", 5)
-                        feedback = result.get("feedback", "Good attempt.")
-                        
-                        # Format feedback conversationally
-                        is_last = session.current_question_idx >= progress['total'] - 1
-                        response_text = format_feedback_conversationally(score, feedback, is_last)
+                    # Stream feedback into the interviewer bubble as it arrives
+                    bubble = st.empty()
+                    result = {}
+                    streamed = ""
+                    for chunk in stream_evaluate_response(
+                        question.get("id", "custom"), transcription,
+                        user_id=get_user_id(), question=question
+                    ):
+                        if isinstance(chunk, dict):
+                            result = chunk
+                            continue
+                        streamed += chunk
+                        bubble.markdown(f'''
+                        <div class="speech-bubble">
+                            {streamed}
+                        </div>
+                        ''', unsafe_allow_html=True)
+                    score = result.get("overall_score", 5)
+                    feedback = result.get("feedback", "Good attempt.")
+                    
+                    # Queue a follow-up before deciding whether this was the last question
+                    session.next_follow_up(transcription, score)
+                    
+                    # Format feedback conversationally
+                    is_last = session.current_question_idx >= len(session.interview_plan["questions"]) - 1
+                    response_text = format_feedback_conversationally(score, feedback, is_last)
                     
                     # Show interviewer response
-                    st.markdown(f'''
+                    bubble.markdown(f'''
                     <div class="speech-bubble">
                         {response_text}
                     </div>
@@ -301,7 +323,11 @@ else:
                 if st.button("Submit"):
                     if answer:
                         from mockmentor.tools import evaluate_response
-                        result = evaluate_response(question.get("id", "custom"), answer)
+                        from mockmentor.interview_session import get_user_id
+                        result = evaluate_response(
+                            question.get("id", "custom"), answer,
+                            user_id=get_user_id(), question=question
+                        )
                         session.record_answer(answer, result.get("overall_score", 5), result.get("feedback", ""))
                         session.advance_question()
                         st.rerun()